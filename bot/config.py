@@ -19,11 +19,33 @@ LOGS_DIR.mkdir(exist_ok=True)
 # Bot configuration
 API_TOKEN = os.getenv("BOT_TOKEN", "")
 DB_PATH = DATA_DIR / "reminders.db"
+DB_READER_POOL_SIZE = int(os.getenv("DB_READER_POOL_SIZE", 4))
 
 # Scheduler settings
-CHECK_INTERVAL_SECONDS = int(os.getenv("CHECK_INTERVAL_SECONDS", 60))
 REMINDER_OFFSET_MINUTES = int(os.getenv("REMINDER_OFFSET_MINUTES", 15))
 TEMP_REMINDER_EXPIRATION_HOURS = int(os.getenv("TEMP_REMINDER_EXPIRATION_HOURS", 1))
+# Reminders missed by longer than this (bot down, slow pass) are skipped instead of sent late
+CATCH_UP_WINDOW_MINUTES = int(os.getenv("CATCH_UP_WINDOW_MINUTES", 60))
+
+# Delivery settings (Telegram allows ~30 messages/s overall and ~1 message/s per chat)
+DELIVERY_WORKERS = int(os.getenv("DELIVERY_WORKERS", 8))
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", 30))
+TELEGRAM_CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", 1))
+
+# Outbox settings (messages queued by the scheduler and sent by a separate loop)
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 100))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 5))
+OUTBOX_RETRY_SECONDS = int(os.getenv("OUTBOX_RETRY_SECONDS", 30))
+# When messages wait in the outbox longer than this, follow-ups are dropped so new reminders are not held up
+OUTBOX_SHED_LAG_SECONDS = int(os.getenv("OUTBOX_SHED_LAG_SECONDS", 120))
+
+# FSM storage settings (dialog state is kept in the database, recent users also in memory)
+FSM_CACHE_SIZE = int(os.getenv("FSM_CACHE_SIZE", 1000))
+# Dialogs left unfinished for longer than this are forgotten
+FSM_STATE_TTL_HOURS = int(os.getenv("FSM_STATE_TTL_HOURS", 24))
+
+# Number of user profiles (timezone, onboarding flag, status) kept in memory
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 10000))
 
 # Date and time formats
 DATE_FORMAT = "%d.%m"
@@ -1,5 +1,49 @@
 """Database module for reminder bot."""
 
-from .db import create_db, get_user_timezone
+from .connection import open_connections, close_connections, get_reader, get_writer
+from .writer import start_writer, stop_writer, run_write, execute_write
+from .fsm_storage import SQLiteStorage
+from .profiles import (
+    UserProfile,
+    get_user_profile,
+    get_user_timezone,
+    get_user_tzinfo,
+    set_user_timezone,
+    complete_onboarding,
+    forget_user_profiles
+)
+from .db import (
+    create_db,
+    insert_reminder,
+    snooze_reminder,
+    refresh_next_fire_at,
+    reactivate_user,
+    archive_reminder,
+    complete_reminder
+)
 
-__all__ = ["create_db", "get_user_timezone"]
+__all__ = [
+    "open_connections",
+    "close_connections",
+    "get_reader",
+    "get_writer",
+    "start_writer",
+    "stop_writer",
+    "run_write",
+    "execute_write",
+    "SQLiteStorage",
+    "create_db",
+    "UserProfile",
+    "get_user_profile",
+    "get_user_timezone",
+    "get_user_tzinfo",
+    "set_user_timezone",
+    "complete_onboarding",
+    "forget_user_profiles",
+    "insert_reminder",
+    "snooze_reminder",
+    "refresh_next_fire_at",
+    "reactivate_user",
+    "archive_reminder",
+    "complete_reminder"
+]
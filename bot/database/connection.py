@@ -0,0 +1,93 @@
+"""Shared long-lived SQLite connections."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import aiosqlite
+
+from bot.config import DB_PATH, DB_READER_POOL_SIZE
+
+# Per-connection tuning: WAL lets readers run alongside the writer, and
+# synchronous=NORMAL only fsyncs on checkpoints instead of every commit.
+# Foreign keys are off by default in SQLite and needed for ON DELETE CASCADE
+PRAGMAS = (
+    'PRAGMA busy_timeout = 5000',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA cache_size = -16000',
+    'PRAGMA mmap_size = 268435456',
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA foreign_keys = ON',
+)
+
+_writer: aiosqlite.Connection | None = None
+_writer_lock = asyncio.Lock()
+_readers: asyncio.Queue | None = None
+_reader_connections: list[aiosqlite.Connection] = []
+
+
+async def _connect() -> aiosqlite.Connection:
+    """Open a connection with the shared pragmas applied."""
+    db = await aiosqlite.connect(DB_PATH)
+    for pragma in PRAGMAS:
+        async with db.execute(pragma):
+            pass
+    return db
+
+
+async def open_connections():
+    """Open the writer connection and the reader pool."""
+    global _writer, _readers
+
+    _writer = await _connect()
+    async with _writer.execute('PRAGMA journal_mode = WAL'):
+        pass
+
+    _readers = asyncio.Queue()
+    for _ in range(DB_READER_POOL_SIZE):
+        db = await _connect()
+        _reader_connections.append(db)
+        _readers.put_nowait(db)
+
+
+async def close_connections():
+    """Close all connections opened by open_connections()."""
+    global _writer, _readers
+
+    for db in _reader_connections:
+        await db.close()
+    _reader_connections.clear()
+    _readers = None
+
+    if _writer is not None:
+        async with _writer_lock:
+            await _writer.close()
+        _writer = None
+
+
+@asynccontextmanager
+async def get_writer() -> AsyncIterator[aiosqlite.Connection]:
+    """
+    Borrow the writer connection for exclusive use.
+
+    SQLite allows a single writer, so callers are serialized here rather
+    than on the database lock. An unfinished transaction is rolled back
+    if the block raises.
+    """
+    async with _writer_lock:
+        try:
+            yield _writer
+        except BaseException:
+            if _writer.in_transaction:
+                await _writer.rollback()
+            raise
+
+
+@asynccontextmanager
+async def get_reader() -> AsyncIterator[aiosqlite.Connection]:
+    """Borrow a connection from the reader pool."""
+    db = await _readers.get()
+    try:
+        yield db
+    finally:
+        _readers.put_nowait(db)
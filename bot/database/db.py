@@ -1,64 +1,243 @@
 """Database operations for the reminder bot."""
 
+import datetime
 import aiosqlite
-from bot.config import DB_PATH
+import pytz
+
+from bot.config import REMINDER_OFFSET_MINUTES
+from bot.database.connection import get_writer
+from bot.database.history_stats import record_history_action
+from bot.database.migrations import migrate
+from bot.database.occurrences import store_occurrences
+from bot.database.profiles import forget_user_profiles
+from bot.database.writer import run_write
+from bot.utils import current_minute_timestamp, earliest_timestamp
 
 
 async def create_db():
-    """Create database tables if they don't exist."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute('''
-        CREATE TABLE IF NOT EXISTS reminders (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            name_reminder TEXT NOT NULL,
-            frequency TEXT NOT NULL,
-            dates TEXT NOT NULL,
-            times TEXT NOT NULL,
-            active INTEGER NOT NULL,
-            expiration_time TEXT,
-            last_message_id INTEGER,
-            created_at TEXT,
-            completed_at TEXT
-        )
-        ''')
-        await db.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            user_id INTEGER PRIMARY KEY,
-            timezone TEXT NOT NULL,
-            onboarding_completed INTEGER DEFAULT 0
+    """Create the database schema or upgrade it to the latest version."""
+    async with get_writer() as db:
+        await migrate(db)
+
+
+async def insert_reminder(
+    user_id: int,
+    name_reminder: str,
+    frequency: str,
+    dates: str,
+    times: str,
+    timezone: str
+) -> tuple[int, int | None]:
+    """
+    Create a reminder together with its occurrences.
+
+    Args:
+        user_id: Telegram user ID
+        name_reminder: Reminder name
+        frequency: Frequency string
+        dates: Comma-separated dates (DD.MM.YYYY)
+        times: Comma-separated times (HH:MM) or time windows (HH:MM-HH:MM/step)
+        timezone: User's timezone string
+
+    Returns:
+        Tuple of (reminder_id, next_fire_at)
+    """
+    after = current_minute_timestamp()
+    created_at = datetime.datetime.now(pytz.UTC).isoformat()
+
+    async def insert(db: aiosqlite.Connection) -> tuple[int, int | None]:
+        cursor = await db.execute(
+            'INSERT INTO reminders (user_id, name_reminder, frequency, dates, times, active, created_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (user_id, name_reminder, frequency, dates, times, 1, created_at)
         )
-        ''')
-        await db.execute('''
-        CREATE TABLE IF NOT EXISTS reminder_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            reminder_id INTEGER,
-            user_id INTEGER NOT NULL,
-            name_reminder TEXT NOT NULL,
-            frequency TEXT NOT NULL,
-            dates TEXT NOT NULL,
-            times TEXT NOT NULL,
-            completed_at TEXT NOT NULL,
-            action TEXT NOT NULL
+        reminder_id = cursor.lastrowid
+        next_fire_at = await store_occurrences(
+            db, reminder_id, frequency, dates, times, timezone, after
         )
-        ''')
-        await db.commit()
+        return reminder_id, next_fire_at
+
+    return await run_write(insert)
 
 
-async def get_user_timezone(user_id: int) -> str | None:
+async def snooze_reminder(reminder_id: int, user_id: int, snooze_at: int) -> int | None:
     """
-    Get user's timezone from database.
+    Postpone the next follow-up of a reminder.
+
+    The follow-up deadline is extended if needed, so the snoozed message
+    is sent at least once more.
+
+    Args:
+        reminder_id: Reminder ID
+        user_id: Telegram user ID of the owner
+        snooze_at: Time of the follow-up as UTC epoch seconds
+
+    Returns:
+        Next wake-up time of the reminder or None if not found
+    """
+    nag_deadline = snooze_at + REMINDER_OFFSET_MINUTES * 60
+
+    async def snooze(db: aiosqlite.Connection) -> int | None:
+        async with db.execute(
+            'UPDATE reminders SET nag_at = ?, nag_deadline = MAX(COALESCE(nag_deadline, 0), ?), '
+            'nag_snoozed = 1 WHERE id = ? AND user_id = ? RETURNING next_fire_at',
+            (snooze_at, nag_deadline, reminder_id, user_id)
+        ) as cursor:
+            row = await cursor.fetchone()
+        return earliest_timestamp(row[0], snooze_at) if row else None
+
+    return await run_write(snooze)
+
+
+async def refresh_next_fire_at(user_id: int, timezone: str) -> list[tuple[int, int | None]]:
+    """
+    Recompute occurrences and next fire times of a user's reminders after a timezone change.
 
     Args:
         user_id: Telegram user ID
+        timezone: New timezone string
 
     Returns:
-        Timezone string or None if not set
+        List of (reminder_id, wake_at) pairs for the timer engine
     """
-    async with aiosqlite.connect(DB_PATH) as db:
+    after = current_minute_timestamp()
+
+    async def refresh(db: aiosqlite.Connection) -> list[tuple[int, int | None]]:
         async with db.execute(
-            'SELECT timezone FROM users WHERE user_id = ?',
+            'SELECT id, frequency, dates, times, nag_at FROM reminders WHERE user_id = ? AND active = 1',
             (user_id,)
         ) as cursor:
-            result = await cursor.fetchone()
-            return result[0] if result else None
+            rows = await cursor.fetchall()
+
+        return [
+            (
+                reminder_id,
+                earliest_timestamp(
+                    await store_occurrences(
+                        db, reminder_id, frequency, dates, times, timezone, after
+                    ),
+                    nag_at
+                )
+            )
+            for reminder_id, frequency, dates, times, nag_at in rows
+        ]
+
+    return await run_write(refresh)
+
+
+async def reactivate_user(user_id: int, timezone: str) -> list[tuple[int, int | None]]:
+    """
+    Resume a user who was marked blocked, together with their reminders.
+
+    Args:
+        user_id: Telegram user ID
+        timezone: User's timezone string
+
+    Returns:
+        List of (reminder_id, wake_at) pairs for the timer engine, empty if the user was not blocked
+    """
+    async def reactivate(db: aiosqlite.Connection) -> bool:
+        async with db.execute(
+            "UPDATE users SET status = 'active' WHERE user_id = ? AND status != 'active' RETURNING user_id",
+            (user_id,)
+        ) as cursor:
+            was_blocked = await cursor.fetchone() is not None
+        if was_blocked:
+            await db.execute('UPDATE reminders SET active = 1 WHERE user_id = ?', (user_id,))
+        return was_blocked
+
+    was_blocked = await run_write(reactivate)
+    forget_user_profiles((user_id,))
+    if not was_blocked:
+        return []
+    # Slots passed while the user was away are skipped
+    return await refresh_next_fire_at(user_id, timezone)
+
+
+async def _save_history(
+    db: aiosqlite.Connection,
+    reminder_id: int,
+    user_id: int,
+    action: str
+) -> tuple | None:
+    """
+    Copy a reminder into reminder_history and update the statistics rollups.
+
+    Returns:
+        Tuple of (name_reminder, frequency, dates, times) or None if not found
+    """
+    async with db.execute(
+        'SELECT r.name_reminder, r.frequency, r.dates, r.times, u.timezone FROM reminders r '
+        'LEFT JOIN users u ON u.user_id = r.user_id WHERE r.id = ? AND r.user_id = ?',
+        (reminder_id, user_id)
+    ) as cursor:
+        row = await cursor.fetchone()
+
+    if not row:
+        return None
+
+    *reminder_info, timezone = row
+    name, frequency, dates, times = reminder_info
+    completed_dt = datetime.datetime.now(pytz.UTC)
+    await db.execute(
+        'INSERT INTO reminder_history (reminder_id, user_id, name_reminder, frequency, dates, times, completed_at, action) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        (reminder_id, user_id, name, frequency, dates, times, completed_dt.isoformat(), action)
+    )
+
+    # Statistics are counted per day of the user's timezone
+    local_day = completed_dt.astimezone(pytz.timezone(timezone or 'UTC')).date()
+    await record_history_action(db, user_id, local_day, action)
+    return tuple(reminder_info)
+
+
+async def archive_reminder(reminder_id: int, user_id: int) -> tuple | None:
+    """
+    Save a reminder to history as deleted and delete it.
+
+    Args:
+        reminder_id: Reminder ID
+        user_id: Telegram user ID of the owner
+
+    Returns:
+        Tuple of (name_reminder, frequency, dates, times) or None if not found
+    """
+    async def archive(db: aiosqlite.Connection) -> tuple | None:
+        reminder_info = await _save_history(db, reminder_id, user_id, 'deleted')
+        if reminder_info:
+            await db.execute('DELETE FROM reminders WHERE id = ?', (reminder_id,))
+        return reminder_info
+
+    return await run_write(archive)
+
+
+async def complete_reminder(reminder_id: int, user_id: int) -> tuple[tuple, int | None] | None:
+    """
+    Mark the current occurrence of a reminder as done.
+
+    The reminder is saved to history and its follow-ups stop. A reminder
+    without further slots is deleted.
+
+    Args:
+        reminder_id: Reminder ID
+        user_id: Telegram user ID of the owner
+
+    Returns:
+        Tuple of (reminder_info, next_fire_at) or None if not found
+    """
+    async def complete(db: aiosqlite.Connection) -> tuple[tuple, int | None] | None:
+        reminder_info = await _save_history(db, reminder_id, user_id, 'completed')
+        if not reminder_info:
+            return None
+
+        async with db.execute(
+            'UPDATE reminders SET nag_at = NULL, nag_deadline = NULL, nag_count = 0, nag_snoozed = 0 '
+            'WHERE id = ? RETURNING next_fire_at',
+            (reminder_id,)
+        ) as cursor:
+            next_fire_at = (await cursor.fetchone())[0]
+        if next_fire_at is None:
+            await db.execute('DELETE FROM reminders WHERE id = ?', (reminder_id,))
+        return reminder_info, next_fire_at
+
+    return await run_write(complete)
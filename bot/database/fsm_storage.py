@@ -0,0 +1,130 @@
+"""FSM storage that keeps dialog state in SQLite behind a bounded LRU cache."""
+
+import datetime
+import json
+import time
+from collections import OrderedDict
+from typing import Any, NamedTuple
+
+import aiosqlite
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+
+from bot.config import FSM_CACHE_SIZE, FSM_STATE_TTL_HOURS
+from bot.database.connection import get_reader
+from bot.database.writer import run_write
+
+# Expired rows are deleted at most this often, piggybacked on a state write
+PURGE_INTERVAL_SECONDS = 3600
+
+
+class _Entry(NamedTuple):
+    """Cached state of a storage key; data is kept serialized, so callers get a fresh copy."""
+    state: str | None
+    data: str
+    updated_at: int
+
+
+_EMPTY_DATA = "{}"
+
+
+def _encode(value: Any) -> Any:
+    """Serialize values JSON has no type for; the calendar keeps selected dates as date objects."""
+    if isinstance(value, datetime.date):
+        return {"__date__": value.isoformat()}
+    raise TypeError(f"Cannot store {type(value).__name__} in FSM data")
+
+
+def _decode(obj: dict) -> Any:
+    """Restore values serialized by _encode."""
+    if obj.keys() == {"__date__"}:
+        return datetime.date.fromisoformat(obj["__date__"])
+    return obj
+
+
+def _storage_key(key: StorageKey) -> str:
+    """Compact text key of a StorageKey."""
+    return f"{key.bot_id}:{key.chat_id}:{key.user_id}:{key.thread_id or ''}:{key.destiny}"
+
+
+class SQLiteStorage(BaseStorage):
+    """
+    Persistent FSM storage in the fsm_storage table.
+
+    A dialog interrupted by a restart continues where it stopped. Recently
+    used keys, including users without any state, are answered from an
+    LRU cache of FSM_CACHE_SIZE entries; every change is written through.
+    State untouched for FSM_STATE_TTL_HOURS counts as abandoned and is
+    dropped, so forgotten dialogs do not pile up.
+    """
+
+    def __init__(self):
+        self._cache: OrderedDict[str, _Entry] = OrderedDict()
+        self._next_purge_at = 0
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        entry = await self._get(_storage_key(key))
+        await self._set(_storage_key(key), state.state if isinstance(state, State) else state, entry.data)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        return (await self._get(_storage_key(key))).state
+
+    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
+        entry = await self._get(_storage_key(key))
+        await self._set(_storage_key(key), entry.state, json.dumps(data, default=_encode))
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        return json.loads((await self._get(_storage_key(key))).data, object_hook=_decode)
+
+    async def close(self) -> None:
+        self._cache.clear()
+
+    def _remember(self, storage_key: str, entry: _Entry):
+        """Put an entry into the cache, evicting the least recently used one."""
+        self._cache[storage_key] = entry
+        self._cache.move_to_end(storage_key)
+        if len(self._cache) > FSM_CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    async def _get(self, storage_key: str) -> _Entry:
+        """Get the entry of a key from the cache or the database; expired state reads as empty."""
+        now_ts = int(time.time())
+        entry = self._cache.get(storage_key)
+        if entry is None:
+            async with get_reader() as db:
+                async with db.execute(
+                    'SELECT state, data, updated_at FROM fsm_storage WHERE key = ?',
+                    (storage_key,)
+                ) as cursor:
+                    row = await cursor.fetchone()
+            entry = _Entry(*row) if row else _Entry(None, _EMPTY_DATA, now_ts)
+        if entry.updated_at < now_ts - FSM_STATE_TTL_HOURS * 3600:
+            entry = _Entry(None, _EMPTY_DATA, now_ts)
+        self._remember(storage_key, entry)
+        return entry
+
+    async def _set(self, storage_key: str, state: str | None, data: str):
+        """Write an entry through the cache; an empty one deletes its row."""
+        now_ts = int(time.time())
+        purge = now_ts >= self._next_purge_at
+        if purge:
+            self._next_purge_at = now_ts + PURGE_INTERVAL_SECONDS
+
+        async def save(db: aiosqlite.Connection):
+            if state is None and data == _EMPTY_DATA:
+                await db.execute('DELETE FROM fsm_storage WHERE key = ?', (storage_key,))
+            else:
+                await db.execute(
+                    'INSERT INTO fsm_storage (key, state, data, updated_at) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT (key) DO UPDATE SET state = excluded.state, data = excluded.data, '
+                    'updated_at = excluded.updated_at',
+                    (storage_key, state, data, now_ts)
+                )
+            if purge:
+                await db.execute(
+                    'DELETE FROM fsm_storage WHERE updated_at < ?',
+                    (now_ts - FSM_STATE_TTL_HOURS * 3600,)
+                )
+
+        await run_write(save)
+        self._remember(storage_key, _Entry(state, data, now_ts))
@@ -0,0 +1,57 @@
+"""Incremental rollups of reminder_history for the statistics screen."""
+
+import datetime
+
+import aiosqlite
+
+
+async def record_history_action(
+    db: aiosqlite.Connection,
+    user_id: int,
+    day: datetime.date,
+    action: str
+):
+    """
+    Count a history entry in the user's rollups.
+
+    history_daily keeps completed and deleted counts per local day;
+    history_stats keeps totals and the streak of consecutive days with a
+    completed reminder. Entries must be recorded in chronological order.
+
+    Args:
+        db: Writer connection
+        user_id: Telegram user ID
+        day: Local date of the action
+        action: 'completed' or 'deleted'
+    """
+    completed, deleted = (1, 0) if action == 'completed' else (0, 1)
+    await db.execute(
+        'INSERT INTO history_daily (user_id, day, completed, deleted) VALUES (?, ?, ?, ?) '
+        'ON CONFLICT (user_id, day) DO UPDATE SET '
+        'completed = completed + excluded.completed, deleted = deleted + excluded.deleted',
+        (user_id, day.isoformat(), completed, deleted)
+    )
+
+    async with db.execute(
+        'SELECT current_streak, best_streak, last_completed_day FROM history_stats WHERE user_id = ?',
+        (user_id,)
+    ) as cursor:
+        row = await cursor.fetchone()
+    current_streak, best_streak, last_completed_day = row or (0, 0, None)
+
+    if completed and last_completed_day != day.isoformat():
+        yesterday = (day - datetime.timedelta(days=1)).isoformat()
+        current_streak = current_streak + 1 if last_completed_day == yesterday else 1
+        best_streak = max(best_streak, current_streak)
+        last_completed_day = day.isoformat()
+
+    await db.execute(
+        'INSERT INTO history_stats '
+        '(user_id, completed, deleted, current_streak, best_streak, last_completed_day) '
+        'VALUES (?, ?, ?, ?, ?, ?) '
+        'ON CONFLICT (user_id) DO UPDATE SET '
+        'completed = completed + excluded.completed, deleted = deleted + excluded.deleted, '
+        'current_streak = excluded.current_streak, best_streak = excluded.best_streak, '
+        'last_completed_day = excluded.last_completed_day',
+        (user_id, completed, deleted, current_streak, best_streak, last_completed_day)
+    )
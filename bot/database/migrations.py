@@ -0,0 +1,350 @@
+"""Versioned schema migrations tracked with PRAGMA user_version."""
+
+import datetime
+import logging
+
+import aiosqlite
+import pytz
+
+from bot.config import FREQUENCY_ZERO
+from bot.database.history_stats import record_history_action
+from bot.database.occurrences import store_occurrences
+from bot.utils import compute_next_fire_at, current_minute_timestamp, occurrence_timestamps
+
+logger = logging.getLogger(__name__)
+
+
+async def migrate(db: aiosqlite.Connection):
+    """
+    Apply pending migrations in order.
+
+    Each migration runs in its own transaction together with the version
+    bump, so an interrupted upgrade resumes from the last finished step.
+    Databases created before versioning report version 0; the first steps
+    use IF NOT EXISTS checks so they are safe to run against them.
+
+    Args:
+        db: Writer connection
+    """
+    async with db.execute('PRAGMA user_version') as cursor:
+        current_version = (await cursor.fetchone())[0]
+
+    for version, migration in enumerate(MIGRATIONS[current_version:], start=current_version + 1):
+        await db.execute('BEGIN IMMEDIATE')
+        await migration(db)
+        await db.execute(f'PRAGMA user_version = {version}')
+        await db.commit()
+        logger.info(f"Applied database migration {version} ({migration.__name__})")
+
+
+async def _ensure_column(db: aiosqlite.Connection, table: str, column: str, definition: str):
+    """Add a column to an existing table if it is missing."""
+    async with db.execute(f'PRAGMA table_info({table})') as cursor:
+        columns = [row[1] for row in await cursor.fetchall()]
+    if column not in columns:
+        await db.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+
+async def _create_tables(db: aiosqlite.Connection):
+    """Create base tables."""
+    await db.execute('''
+    CREATE TABLE IF NOT EXISTS reminders (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        name_reminder TEXT NOT NULL,
+        frequency TEXT NOT NULL,
+        dates TEXT NOT NULL,
+        times TEXT NOT NULL,
+        active INTEGER NOT NULL,
+        expiration_time TEXT,
+        last_message_id INTEGER,
+        created_at TEXT,
+        completed_at TEXT
+    )
+    ''')
+    await db.execute('''
+    CREATE TABLE IF NOT EXISTS users (
+        user_id INTEGER PRIMARY KEY,
+        timezone TEXT NOT NULL,
+        onboarding_completed INTEGER DEFAULT 0
+    )
+    ''')
+    await db.execute('''
+    CREATE TABLE IF NOT EXISTS reminder_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        reminder_id INTEGER,
+        user_id INTEGER NOT NULL,
+        name_reminder TEXT NOT NULL,
+        frequency TEXT NOT NULL,
+        dates TEXT NOT NULL,
+        times TEXT NOT NULL,
+        completed_at TEXT NOT NULL,
+        action TEXT NOT NULL
+    )
+    ''')
+
+
+async def _add_next_fire_at(db: aiosqlite.Connection):
+    """Add reminders.next_fire_at."""
+    await _ensure_column(db, 'reminders', 'next_fire_at', 'INTEGER')
+    await db.execute(
+        'CREATE INDEX IF NOT EXISTS idx_reminders_active_next_fire_at '
+        'ON reminders (active, next_fire_at)'
+    )
+
+    after = current_minute_timestamp()
+    async with db.execute(
+        'SELECT r.id, r.dates, r.times, u.timezone FROM reminders r '
+        'JOIN users u ON u.user_id = r.user_id '
+        'WHERE r.active = 1 AND r.next_fire_at IS NULL'
+    ) as cursor:
+        rows = await cursor.fetchall()
+
+    await db.executemany(
+        'UPDATE reminders SET next_fire_at = ? WHERE id = ?',
+        [
+            (compute_next_fire_at(dates, times, timezone, after), reminder_id)
+            for reminder_id, dates, times, timezone in rows
+        ]
+    )
+
+
+async def _add_reminder_occurrences(db: aiosqlite.Connection):
+    """Add reminder_occurrences."""
+    await db.execute('''
+    CREATE TABLE IF NOT EXISTS reminder_occurrences (
+        reminder_id INTEGER NOT NULL REFERENCES reminders (id) ON DELETE CASCADE,
+        fire_at_utc INTEGER NOT NULL,
+        PRIMARY KEY (reminder_id, fire_at_utc)
+    ) WITHOUT ROWID
+    ''')
+    await db.execute(
+        'CREATE INDEX IF NOT EXISTS idx_reminder_occurrences_fire_at_utc '
+        'ON reminder_occurrences (fire_at_utc)'
+    )
+
+    # Only upcoming slots are stored; past ones would never be read again
+    after = current_minute_timestamp()
+    async with db.execute(
+        'SELECT r.id, r.dates, r.times, u.timezone FROM reminders r '
+        'JOIN users u ON u.user_id = r.user_id '
+        'WHERE NOT EXISTS (SELECT 1 FROM reminder_occurrences o WHERE o.reminder_id = r.id)'
+    ) as cursor:
+        rows = await cursor.fetchall()
+
+    await db.executemany(
+        'INSERT INTO reminder_occurrences (reminder_id, fire_at_utc) VALUES (?, ?)',
+        [
+            (reminder_id, fire_at)
+            for reminder_id, dates, times, timezone in rows
+            for fire_at in occurrence_timestamps(dates, times, timezone)
+            if fire_at >= after
+        ]
+    )
+
+
+async def _add_lookup_indexes(db: aiosqlite.Connection):
+    """Index per-user lookups and expiration cleanup."""
+    # Per-user reminder lists and ownership checks
+    await db.execute(
+        'CREATE INDEX IF NOT EXISTS idx_reminders_user_id_active '
+        'ON reminders (user_id, active)'
+    )
+    # Scheduler cleanup of expired temporary reminders
+    await db.execute(
+        'CREATE INDEX IF NOT EXISTS idx_reminders_expiration_time '
+        'ON reminders (expiration_time) WHERE expiration_time IS NOT NULL'
+    )
+    # History statistics and the latest entries
+    await db.execute(
+        'CREATE INDEX IF NOT EXISTS idx_reminder_history_user_id_completed_at '
+        'ON reminder_history (user_id, completed_at)'
+    )
+
+
+async def _add_recurrence_state(db: aiosqlite.Connection):
+    """Add reminders.recurrence_count and reminders.last_fired_at."""
+    await _ensure_column(db, 'reminders', 'recurrence_count', 'INTEGER NOT NULL DEFAULT 0')
+    await _ensure_column(db, 'reminders', 'last_fired_at', 'INTEGER')
+
+
+async def _add_nag_state(db: aiosqlite.Connection):
+    """Move follow-up state from temporary rows onto reminders."""
+    await _ensure_column(db, 'reminders', 'nag_at', 'INTEGER')
+    await _ensure_column(db, 'reminders', 'nag_deadline', 'INTEGER')
+    await _ensure_column(db, 'reminders', 'nag_count', 'INTEGER NOT NULL DEFAULT 0')
+    await db.execute(
+        'CREATE INDEX IF NOT EXISTS idx_reminders_active_nag_at '
+        'ON reminders (active, nag_at) WHERE nag_at IS NOT NULL'
+    )
+
+    # Temporary rows become one-off reminders that only carry follow-ups,
+    # so buttons of messages already sent keep pointing at a valid row
+    await db.execute(
+        'DELETE FROM reminder_occurrences WHERE reminder_id IN '
+        '(SELECT id FROM reminders WHERE expiration_time IS NOT NULL)'
+    )
+    await db.execute(
+        "UPDATE reminders SET nag_deadline = CAST(strftime('%s', expiration_time) AS INTEGER) "
+        'WHERE expiration_time IS NOT NULL'
+    )
+    await db.execute(
+        'UPDATE reminders SET nag_at = COALESCE(next_fire_at, nag_deadline), '
+        'next_fire_at = NULL, expiration_time = NULL '
+        'WHERE expiration_time IS NOT NULL'
+    )
+    await db.execute('DROP INDEX IF EXISTS idx_reminders_expiration_time')
+
+
+async def _add_digest_mode(db: aiosqlite.Connection):
+    """Add users.digest_mode."""
+    await _ensure_column(db, 'users', 'digest_mode', 'INTEGER NOT NULL DEFAULT 0')
+
+
+async def _add_nag_ping(db: aiosqlite.Connection):
+    """Add users.nag_ping."""
+    await _ensure_column(db, 'users', 'nag_ping', 'INTEGER NOT NULL DEFAULT 1')
+
+
+async def _add_outbox(db: aiosqlite.Connection):
+    """Add outbox."""
+    await db.execute('''
+    CREATE TABLE IF NOT EXISTS outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        chat_id INTEGER NOT NULL,
+        text TEXT NOT NULL,
+        reply_markup TEXT NOT NULL,
+        reminder_ids TEXT NOT NULL,
+        replace_message_ids TEXT NOT NULL,
+        edit_message_id INTEGER,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at INTEGER NOT NULL
+    )
+    ''')
+    await db.execute(
+        'CREATE INDEX IF NOT EXISTS idx_outbox_next_attempt_at '
+        'ON outbox (next_attempt_at)'
+    )
+
+
+async def _add_user_status(db: aiosqlite.Connection):
+    """Add users.status."""
+    # 'active', or 'blocked' once Telegram refuses messages to the user
+    await _ensure_column(db, 'users', 'status', "TEXT NOT NULL DEFAULT 'active'")
+
+
+async def _add_scheduler_state(db: aiosqlite.Connection):
+    """Add scheduler_state."""
+    await db.execute('''
+    CREATE TABLE IF NOT EXISTS scheduler_state (
+        key TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    ) WITHOUT ROWID
+    ''')
+
+
+async def _add_delivery_priority(db: aiosqlite.Connection):
+    """Add reminders.nag_snoozed, outbox.priority and outbox.due_at."""
+    # 1 while the pending follow-up was set by a snooze button
+    await _ensure_column(db, 'reminders', 'nag_snoozed', 'INTEGER NOT NULL DEFAULT 0')
+    await _ensure_column(db, 'outbox', 'priority', 'INTEGER NOT NULL DEFAULT 0')
+    await _ensure_column(db, 'outbox', 'due_at', 'INTEGER')
+
+
+async def _add_fsm_storage(db: aiosqlite.Connection):
+    """Add fsm_storage."""
+    await db.execute('''
+    CREATE TABLE IF NOT EXISTS fsm_storage (
+        key TEXT PRIMARY KEY,
+        state TEXT,
+        data TEXT NOT NULL,
+        updated_at INTEGER NOT NULL
+    ) WITHOUT ROWID
+    ''')
+    await db.execute(
+        'CREATE INDEX IF NOT EXISTS idx_fsm_storage_updated_at '
+        'ON fsm_storage (updated_at)'
+    )
+
+
+async def _add_reminder_list_index(db: aiosqlite.Connection):
+    """Index the reminder list ordered by next slot."""
+    # Keyset pages of active reminders; the expression must match the list query
+    await db.execute(
+        'CREATE INDEX IF NOT EXISTS idx_reminders_user_id_list_key '
+        'ON reminders (user_id, COALESCE(next_fire_at, 0), id) WHERE active = 1'
+    )
+
+
+async def _add_history_stats(db: aiosqlite.Connection):
+    """Add history_daily and history_stats, rolled up from reminder_history."""
+    await db.execute('''
+    CREATE TABLE IF NOT EXISTS history_daily (
+        user_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        completed INTEGER NOT NULL DEFAULT 0,
+        deleted INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, day)
+    ) WITHOUT ROWID
+    ''')
+    await db.execute('''
+    CREATE TABLE IF NOT EXISTS history_stats (
+        user_id INTEGER PRIMARY KEY,
+        completed INTEGER NOT NULL DEFAULT 0,
+        deleted INTEGER NOT NULL DEFAULT 0,
+        current_streak INTEGER NOT NULL DEFAULT 0,
+        best_streak INTEGER NOT NULL DEFAULT 0,
+        last_completed_day TEXT
+    ) WITHOUT ROWID
+    ''')
+
+    # Replay the existing history in order, bucketed by the owner's current local day
+    await db.execute('DELETE FROM history_daily')
+    await db.execute('DELETE FROM history_stats')
+    async with db.execute(
+        'SELECT h.user_id, h.completed_at, h.action, u.timezone FROM reminder_history h '
+        'LEFT JOIN users u ON u.user_id = h.user_id ORDER BY h.completed_at, h.id'
+    ) as cursor:
+        rows = await cursor.fetchall()
+
+    for user_id, completed_at, action, timezone in rows:
+        local_dt = datetime.datetime.fromisoformat(completed_at).astimezone(pytz.timezone(timezone or 'UTC'))
+        await record_history_action(db, user_id, local_dt.date(), action)
+
+
+async def _reschedule_recurring_reminders(db: aiosqlite.Connection):
+    """Move recurring reminders stuck past their stored slots to their next period."""
+    # The first backfills read only the literal slots, so a recurring reminder whose
+    # dates were all in the past got no next fire time and was never loaded again
+    after = current_minute_timestamp()
+    async with db.execute(
+        'SELECT r.id, r.frequency, r.dates, r.times, u.timezone FROM reminders r '
+        'JOIN users u ON u.user_id = r.user_id '
+        'WHERE r.active = 1 AND r.next_fire_at IS NULL AND r.frequency != ?',
+        (FREQUENCY_ZERO,)
+    ) as cursor:
+        rows = await cursor.fetchall()
+
+    for reminder_id, frequency, dates, times, timezone in rows:
+        await store_occurrences(db, reminder_id, frequency, dates, times, timezone, after)
+
+
+# Append only: a migration's position is its schema version
+MIGRATIONS = (
+    _create_tables,
+    _add_next_fire_at,
+    _add_reminder_occurrences,
+    _add_lookup_indexes,
+    _add_recurrence_state,
+    _add_nag_state,
+    _add_digest_mode,
+    _add_nag_ping,
+    _add_outbox,
+    _add_user_status,
+    _add_scheduler_state,
+    _add_delivery_priority,
+    _add_fsm_storage,
+    _add_reminder_list_index,
+    _add_history_stats,
+    _reschedule_recurring_reminders,
+)
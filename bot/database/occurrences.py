@@ -0,0 +1,39 @@
+"""Stored occurrences of reminder schedules."""
+
+import aiosqlite
+
+from bot.utils import get_recurrence
+
+
+async def store_occurrences(
+    db: aiosqlite.Connection,
+    reminder_id: int,
+    frequency: str,
+    dates: str,
+    times: str,
+    timezone: str,
+    after: int
+) -> int | None:
+    """
+    Replace the occurrences of a reminder and update its next fire time.
+
+    Only the upcoming period is stored; the scheduler adds the next one
+    when it runs out.
+
+    Returns:
+        The new next_fire_at value
+    """
+    recurrence = get_recurrence(frequency, dates, times, timezone)
+    occurrences = recurrence.after(after, recurrence.slot_count)
+    await db.execute('DELETE FROM reminder_occurrences WHERE reminder_id = ?', (reminder_id,))
+    await db.executemany(
+        'INSERT INTO reminder_occurrences (reminder_id, fire_at_utc) VALUES (?, ?)',
+        [(reminder_id, fire_at) for fire_at in occurrences]
+    )
+
+    next_fire_at = occurrences[0] if occurrences else None
+    await db.execute(
+        'UPDATE reminders SET next_fire_at = ? WHERE id = ?',
+        (next_fire_at, reminder_id)
+    )
+    return next_fire_at
@@ -0,0 +1,145 @@
+"""Cached user profiles: timezone, onboarding flag and status."""
+
+import datetime
+from collections import OrderedDict
+from typing import Iterable, NamedTuple
+
+import aiosqlite
+import pytz
+
+from bot.config import USER_CACHE_SIZE
+from bot.database.connection import get_reader
+from bot.database.writer import run_write
+
+
+class UserProfile(NamedTuple):
+    """Profile fields read on nearly every interaction."""
+    timezone: str | None
+    onboarding_completed: bool
+    status: str
+    tzinfo: datetime.tzinfo | None
+
+
+# Users without a row are cached as None, so repeated lookups by new users hit memory too
+_profiles: OrderedDict[int, UserProfile | None] = OrderedDict()
+
+
+def _profile(timezone: str | None, onboarding_completed: int, status: str) -> UserProfile:
+    """Build a profile with the timezone resolved once."""
+    tzinfo = pytz.timezone(timezone) if timezone else None
+    return UserProfile(timezone, bool(onboarding_completed), status, tzinfo)
+
+
+def _remember(user_id: int, profile: UserProfile | None):
+    """Put a profile into the cache, evicting the least recently used one."""
+    _profiles[user_id] = profile
+    _profiles.move_to_end(user_id)
+    if len(_profiles) > USER_CACHE_SIZE:
+        _profiles.popitem(last=False)
+
+
+async def get_user_profile(user_id: int) -> UserProfile | None:
+    """
+    Get a user's profile, from the cache if possible.
+
+    Profile columns must only be changed through this module, which keeps
+    the cache in sync, or be followed by forget_user_profiles.
+
+    Args:
+        user_id: Telegram user ID
+
+    Returns:
+        UserProfile or None if the user has no row yet
+    """
+    if user_id in _profiles:
+        _profiles.move_to_end(user_id)
+        return _profiles[user_id]
+
+    async with get_reader() as db:
+        async with db.execute(
+            'SELECT timezone, onboarding_completed, status FROM users WHERE user_id = ?',
+            (user_id,)
+        ) as cursor:
+            result = await cursor.fetchone()
+
+    profile = _profile(*result) if result else None
+    _remember(user_id, profile)
+    return profile
+
+
+async def get_user_timezone(user_id: int) -> str | None:
+    """
+    Get user's timezone.
+
+    Args:
+        user_id: Telegram user ID
+
+    Returns:
+        Timezone string or None if not set
+    """
+    profile = await get_user_profile(user_id)
+    return profile.timezone if profile else None
+
+
+async def get_user_tzinfo(user_id: int) -> datetime.tzinfo | None:
+    """
+    Get user's timezone as a pytz tzinfo.
+
+    Args:
+        user_id: Telegram user ID
+
+    Returns:
+        tzinfo or None if the timezone is not set
+    """
+    profile = await get_user_profile(user_id)
+    return profile.tzinfo if profile else None
+
+
+async def set_user_timezone(user_id: int, timezone: str):
+    """
+    Save a user's timezone, creating the user if needed.
+
+    Args:
+        user_id: Telegram user ID
+        timezone: Timezone string
+    """
+    async def save(db: aiosqlite.Connection) -> tuple:
+        async with db.execute(
+            'INSERT INTO users (user_id, timezone, onboarding_completed) VALUES (?, ?, 0) '
+            'ON CONFLICT (user_id) DO UPDATE SET timezone = excluded.timezone '
+            'RETURNING timezone, onboarding_completed, status',
+            (user_id, timezone)
+        ) as cursor:
+            return await cursor.fetchone()
+
+    _remember(user_id, _profile(*await run_write(save)))
+
+
+async def complete_onboarding(user_id: int):
+    """
+    Mark a user's onboarding as completed.
+
+    Args:
+        user_id: Telegram user ID
+    """
+    async def save(db: aiosqlite.Connection) -> tuple | None:
+        async with db.execute(
+            'UPDATE users SET onboarding_completed = 1 WHERE user_id = ? '
+            'RETURNING timezone, onboarding_completed, status',
+            (user_id,)
+        ) as cursor:
+            return await cursor.fetchone()
+
+    result = await run_write(save)
+    _remember(user_id, _profile(*result) if result else None)
+
+
+def forget_user_profiles(user_ids: Iterable[int]):
+    """
+    Drop cached profiles after their users were changed elsewhere.
+
+    Args:
+        user_ids: Telegram user IDs
+    """
+    for user_id in user_ids:
+        _profiles.pop(user_id, None)
@@ -0,0 +1,124 @@
+"""Single writer task that group-commits all database mutations."""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, TypeVar
+
+import aiosqlite
+
+from bot.database.connection import get_writer
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Upper bound of write operations coalesced into one transaction
+MAX_BATCH_SIZE = 256
+
+_queue: asyncio.Queue | None = None
+_task: asyncio.Task | None = None
+
+
+async def start_writer():
+    """Start the writer task."""
+    global _queue, _task
+    _queue = asyncio.Queue()
+    _task = asyncio.create_task(_run())
+
+
+async def stop_writer():
+    """Commit pending writes and stop the writer task."""
+    global _queue, _task
+    if _task is None:
+        return
+    _queue.put_nowait(None)
+    await _task
+    _queue = None
+    _task = None
+
+
+async def run_write(operation: Callable[[aiosqlite.Connection], Awaitable[T]]) -> T:
+    """
+    Run a write operation on the writer task and wait until it is committed.
+
+    The operation runs inside a shared transaction together with whatever
+    else is pending, so it must not commit or roll back by itself.
+
+    Args:
+        operation: Coroutine function receiving the writer connection
+
+    Returns:
+        Result of the operation
+    """
+    future = asyncio.get_running_loop().create_future()
+    _queue.put_nowait((operation, future))
+    return await future
+
+
+async def execute_write(sql: str, parameters: tuple = ()) -> int:
+    """
+    Execute a single write statement on the writer task.
+
+    Args:
+        sql: SQL statement
+        parameters: Statement parameters
+
+    Returns:
+        Row ID of the last inserted row
+    """
+    async def operation(db: aiosqlite.Connection) -> int:
+        cursor = await db.execute(sql, parameters)
+        return cursor.lastrowid
+
+    return await run_write(operation)
+
+
+async def _run():
+    """Take pending writes from the queue and commit them in batches."""
+    while True:
+        batch = [await _queue.get()]
+        while not _queue.empty() and len(batch) < MAX_BATCH_SIZE:
+            batch.append(_queue.get_nowait())
+
+        stopping = None in batch
+        await _commit_batch([item for item in batch if item is not None])
+        if stopping:
+            return
+
+
+async def _commit_batch(batch: list[tuple[Callable, asyncio.Future]]):
+    """
+    Run a batch of write operations in one transaction.
+
+    Each operation gets its own savepoint, so a failing operation only
+    rolls back its own changes and fails its own caller.
+    """
+    if not batch:
+        return
+
+    outcomes: list[tuple[asyncio.Future, Any, BaseException | None]] = []
+    try:
+        async with get_writer() as db:
+            await db.execute('BEGIN IMMEDIATE')
+            for operation, future in batch:
+                await db.execute('SAVEPOINT write_operation')
+                try:
+                    result = await operation(db)
+                except Exception as e:
+                    await db.execute('ROLLBACK TO write_operation')
+                    outcomes.append((future, None, e))
+                else:
+                    outcomes.append((future, result, None))
+                await db.execute('RELEASE write_operation')
+            await db.commit()
+    except Exception as e:
+        logger.exception(f"Failed to commit a batch of {len(batch)} writes")
+        outcomes = [(future, None, e) for _, future in batch]
+
+    for future, result, error in outcomes:
+        if future.done():
+            continue
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
@@ -3,5 +3,6 @@
 from .start import router as start_router
 from .reminders import router as reminders_router
 from .timezone import router as timezone_router
+from .settings import router as settings_router
 
-__all__ = ["start_router", "reminders_router", "timezone_router"]
+__all__ = ["start_router", "reminders_router", "timezone_router", "settings_router"]
@@ -9,14 +9,22 @@ from aiogram.fsm.context import FSMContext
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
 from bot.config import (
-    DB_PATH,
     DATE_FORMAT,
     FULL_DATE_FORMAT,
     TIME_FORMAT,
     FREQUENCY_ZERO,
     CITY_TIMEZONES
 )
-from bot.database import get_user_timezone
+from bot.database import (
+    get_user_timezone,
+    get_user_tzinfo,
+    get_reader,
+    run_write,
+    insert_reminder,
+    snooze_reminder,
+    archive_reminder,
+    complete_reminder
+)
 from bot.keyboards import (
     keyboard,
     inline_markup_cancel,
@@ -27,11 +35,41 @@ from bot.keyboards import (
     inline_markup_popular_times,
     inline_markup_frequency_presets
 )
+from bot.services import reminder_engine
 from bot.states import ReminderStates
-from bot.utils import resolve_date, finalize_date
+from bot.utils import (
+    resolve_date,
+    finalize_date,
+    parse_frequency,
+    parse_time_window,
+    shorten,
+    TimeWindow
+)
 
 router = Router()
 
+# Frequency of reminders created with a time window
+WINDOW_FREQUENCY = "1d"
+
+# Reminders per page of the reminder list
+LIST_PAGE_SIZE = 10
+# Longest name and times shown per reminder, so a page stays within Telegram's 4096 characters
+LIST_TEXT_LENGTH = 100
+# Sections of the reminder list by the day of the next slot
+LIST_GROUPS = ("Сегодня", "Завтра", "На этой неделе", "Позже")
+
+
+def _format_times(times: str) -> str:
+    """Format reminders.times for display, spelling out time windows."""
+    formatted = []
+    for time in times.split(","):
+        window = parse_time_window(time)
+        if window:
+            formatted.append(f"{window.start}–{window.end} каждые {window.step_minutes} мин")
+        else:
+            formatted.append(time)
+    return ", ".join(formatted)
+
 
 @router.message(F.text == '+')
 async def add_reminder(message: types.Message, state: FSMContext):
@@ -46,14 +84,14 @@ async def add_reminder(message: types.Message, state: FSMContext):
             "Пожалуйста, выберите ваш город, соответствующий вашему часовому поясу, из списка:",
             reply_markup=inline_markup_cities
         )
-        await state.update_data(bot_message_id=msg.message_id)
+        await state.update_data(bot_message_id=msg.message_id, window=None)
         await state.set_state(ReminderStates.waiting_for_city)
     else:
         msg = await message.answer(
             "Выберите быстрый шаблон или создайте свое напоминание:",
             reply_markup=inline_markup_quick_templates
         )
-        await state.update_data(bot_message_id=msg.message_id)
+        await state.update_data(bot_message_id=msg.message_id, window=None)
         await state.set_state(ReminderStates.waiting_for_template_choice)
 
 
@@ -62,8 +100,7 @@ async def handle_quick_template(callback: types.CallbackQuery, state: FSMContext
     """Handle quick template selection."""
     template = callback.data
     user_id = callback.from_user.id
-    timezone = await get_user_timezone(user_id)
-    user_tz = pytz.timezone(timezone)
+    user_tz = await get_user_tzinfo(user_id)
     current_dt = datetime.datetime.now(user_tz)
 
     # Calculate date and time based on template
@@ -114,6 +151,7 @@ async def handle_quick_template(callback: types.CallbackQuery, state: FSMContext
 @router.callback_query(lambda c: c.data == "custom_reminder")
 async def handle_custom_reminder(callback: types.CallbackQuery, state: FSMContext):
     """Handle custom reminder creation."""
+    await state.update_data(window=None)
     await callback.message.edit_text(
         "Введите название уведомления:",
         reply_markup=inline_markup_cancel
@@ -139,14 +177,10 @@ async def get_quick_template_name(message: types.Message, state: FSMContext):
 
     # Convert to UTC for storage
     finalized_date = finalize_date(dates, times, current_dt, timezone)
-
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute(
-            'INSERT INTO reminders (user_id, name_reminder, frequency, dates, times, active) '
-            'VALUES (?, ?, ?, ?, ?, ?)',
-            (user_id, name_reminder, frequency, finalized_date, times, 1)
-        )
-        await db.commit()
+    reminder_id, next_fire_at = await insert_reminder(
+        user_id, name_reminder, frequency, finalized_date, times, timezone
+    )
+    reminder_engine.schedule(reminder_id, next_fire_at)
 
     # Calculate when reminder will trigger
     reminder_dt = datetime.datetime.strptime(f"{dates} {times}", f"{FULL_DATE_FORMAT} {TIME_FORMAT}")
@@ -252,7 +286,7 @@ async def handle_frequency_preset(callback: types.CallbackQuery, state: FSMConte
     }
     freq_display = freq_display_map.get(frequency, frequency)
 
-    await state.update_data(frequency=frequency, selected_calendar_dates=[], calendar_mode=False)
+    await state.update_data(frequency=frequency, window=None, selected_calendar_dates=[], calendar_mode=False)
 
     calendar_markup = create_calendar()
 
@@ -292,7 +326,7 @@ async def get_frequency(message: types.Message, state: FSMContext):
     data = await state.get_data()
     bot_message_id = data['bot_message_id']
     name_reminder = data['name_reminder']
-    await state.update_data(frequency=frequency, selected_calendar_dates=[], calendar_mode=False)
+    await state.update_data(frequency=frequency, window=None, selected_calendar_dates=[], calendar_mode=False)
 
     calendar_markup = create_calendar()
 
@@ -309,6 +343,152 @@ async def get_frequency(message: types.Message, state: FSMContext):
     await state.set_state(ReminderStates.waiting_for_date)
 
 
+@router.callback_query(lambda c: c.data.startswith("window_"))
+async def handle_time_window_preset(callback: types.CallbackQuery, state: FSMContext):
+    """Handle time window preset button selection."""
+    current_state = await state.get_state()
+
+    if current_state != ReminderStates.waiting_for_frequency:
+        await callback.answer()
+        return
+
+    data = await state.get_data()
+    name_reminder = data['name_reminder']
+
+    if callback.data == "window_custom":
+        await callback.message.edit_text(
+            text=f"Название уведомления: *{name_reminder}*\n\n"
+                 f"Введите интервал в формате '09:00-18:00 30min' (шаг в min или h):",
+            reply_markup=inline_markup_cancel,
+            parse_mode="Markdown"
+        )
+        await state.set_state(ReminderStates.waiting_for_time_window)
+        await callback.answer()
+        return
+
+    # Extract window from callback data (e.g., "window_09:00-18:00/30" -> "09:00-18:00/30")
+    window = callback.data.replace("window_", "")
+    await state.update_data(
+        frequency=WINDOW_FREQUENCY, window=window, selected_calendar_dates=[], calendar_mode=False
+    )
+
+    await callback.message.edit_text(
+        text=f"Название уведомления: *{name_reminder}*\n"
+             f"Частота: *каждый день, {_format_times(window)}*\n\n"
+             f"Выберите дату начала из календаря или введите ее в формате {DATE_FORMAT} или {FULL_DATE_FORMAT}:",
+        reply_markup=create_calendar(),
+        parse_mode="Markdown"
+    )
+    await state.set_state(ReminderStates.waiting_for_date)
+    await callback.answer()
+
+
+@router.message(ReminderStates.waiting_for_time_window)
+async def get_time_window(message: types.Message, state: FSMContext):
+    """Handle custom time window input."""
+    await message.delete()
+    data = await state.get_data()
+    bot_message_id = data['bot_message_id']
+    name_reminder = data['name_reminder']
+
+    match = re.match(
+        r'^(\d{1,2}:\d{2})\s*-\s*(\d{1,2}:\d{2})\s+((?:\d+(?:min|h)\s*)+)$',
+        message.text.strip().lower()
+    )
+    try:
+        if not match:
+            raise ValueError(message.text)
+        start, end = (
+            datetime.datetime.strptime(time, TIME_FORMAT).strftime(TIME_FORMAT)
+            for time in match.group(1, 2)
+        )
+        intervals = parse_frequency(match.group(3))
+        window = str(TimeWindow(start, end, intervals['h'] * 60 + intervals['min']))
+        parse_time_window(window)
+    except ValueError:
+        await message.bot.edit_message_text(
+            text=f"Название уведомления: *{name_reminder}*\n\n"
+                 f"Пожалуйста, введите интервал в формате '09:00-18:00 30min': "
+                 f"начало раньше конца, шаг в min или h:",
+            chat_id=message.chat.id,
+            message_id=bot_message_id,
+            reply_markup=inline_markup_cancel,
+            parse_mode="Markdown"
+        )
+        return
+
+    await state.update_data(
+        frequency=WINDOW_FREQUENCY, window=window, selected_calendar_dates=[], calendar_mode=False
+    )
+
+    await message.bot.edit_message_text(
+        text=f"Название уведомления: *{name_reminder}*\n"
+             f"Частота: *каждый день, {_format_times(window)}*\n\n"
+             f"Выберите дату начала из календаря или введите ее в формате {DATE_FORMAT} или {FULL_DATE_FORMAT}:",
+        chat_id=message.chat.id,
+        message_id=bot_message_id,
+        reply_markup=create_calendar(),
+        parse_mode="Markdown"
+    )
+    await state.set_state(ReminderStates.waiting_for_date)
+
+
+async def _add_window_reminder(
+    bot,
+    chat_id: int,
+    user_id: int,
+    data: dict,
+    dates: list[str],
+    state: FSMContext
+):
+    """
+    Create a time window reminder once its dates are known.
+
+    The window replaces the time step of the creation flow.
+
+    Args:
+        bot: Bot instance
+        chat_id: Chat with the creation dialog
+        user_id: Telegram user ID
+        data: FSM data of the creation dialog
+        dates: Selected dates (DD.MM or DD.MM.YYYY)
+        state: FSM context
+    """
+    name_reminder = data['name_reminder']
+    window = data['window']
+    window_end = parse_time_window(window).end
+    timezone = await get_user_timezone(user_id)
+    current_dt = datetime.datetime.now(pytz.UTC)
+
+    finalized_dates = sorted({
+        finalize_date(date, window_end, current_dt, timezone) for date in dates
+    })
+
+    reminder_id, next_fire_at = await insert_reminder(
+        user_id, name_reminder, data['frequency'], ",".join(finalized_dates), window, timezone
+    )
+    reminder_engine.schedule(reminder_id, next_fire_at)
+
+    if next_fire_at is not None:
+        reminder_dt = datetime.datetime.fromtimestamp(next_fire_at, pytz.timezone(timezone))
+        next_fire_text = f"⏰ Следующее срабатывание: *{reminder_dt.strftime(f'{FULL_DATE_FORMAT} в {TIME_FORMAT}')}*"
+    else:
+        next_fire_text = "⏰ Интервал уже прошел"
+
+    await bot.edit_message_text(
+        text=f"✅ Напоминание успешно добавлено!\n\n"
+             f"📝 Название: *{name_reminder}*\n"
+             f"🔁 Частота: *каждый день*\n"
+             f"📅 Начиная с: *{finalized_dates[0]}*\n"
+             f"🕐 Время: *{_format_times(window)}*\n\n"
+             f"{next_fire_text}",
+        chat_id=chat_id,
+        message_id=data['bot_message_id'],
+        parse_mode="Markdown"
+    )
+    await state.clear()
+
+
 @router.message(ReminderStates.waiting_for_date)
 async def get_date(message: types.Message, state: FSMContext):
     """Handle reminder date input."""
@@ -330,6 +510,12 @@ async def get_date(message: types.Message, state: FSMContext):
             resolved_date, _ = resolve_date(date)
             resolved_dates.append(resolved_date)
 
+        if data.get('window'):
+            await _add_window_reminder(
+                message.bot, message.chat.id, message.from_user.id, data, resolved_dates, state
+            )
+            return
+
         bot_message_id = data['bot_message_id']
         name_reminder = data['name_reminder']
         frequency = data['frequency']
@@ -417,19 +603,19 @@ async def handle_time_selection(callback: types.CallbackQuery, state: FSMContext
             finalized_dates.append(finalized_date)
     finalized_dates.sort()
 
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute(
-            'INSERT INTO reminders (user_id, name_reminder, frequency, dates, times, active, created_at) '
-            'VALUES (?, ?, ?, ?, ?, ?, ?)',
-            (user_id, name_reminder, frequency, ",".join(finalized_dates), selected_time, 1, datetime.datetime.now(pytz.UTC).isoformat())
-        )
-        await db.commit()
+    reminder_id, next_fire_at = await insert_reminder(
+        user_id, name_reminder, frequency, ",".join(finalized_dates), selected_time, timezone
+    )
+    reminder_engine.schedule(reminder_id, next_fire_at)
 
     # Calculate when reminder will trigger
     user_tz = pytz.timezone(timezone)
-    first_date_str = finalized_dates[0]
-    reminder_dt = datetime.datetime.strptime(f"{first_date_str} {selected_time}", f"{FULL_DATE_FORMAT} {TIME_FORMAT}")
-    reminder_dt = user_tz.localize(reminder_dt)
+    if next_fire_at is not None:
+        reminder_dt = datetime.datetime.fromtimestamp(next_fire_at, user_tz)
+    else:
+        reminder_dt = datetime.datetime.strptime(f"{finalized_dates[0]} {selected_time}", f"{FULL_DATE_FORMAT} {TIME_FORMAT}")
+        reminder_dt = user_tz.localize(reminder_dt)
+    first_date_str = reminder_dt.strftime(FULL_DATE_FORMAT)
     current_dt_tz = datetime.datetime.now(user_tz)
     time_diff = reminder_dt - current_dt_tz
 
@@ -486,20 +672,20 @@ async def get_time(message: types.Message, state: FSMContext):
                     finalized_dates.append(finalized_date)
         finalized_dates.sort()
 
-        async with aiosqlite.connect(DB_PATH) as db:
-            await db.execute(
-                'INSERT INTO reminders (user_id, name_reminder, frequency, dates, times, active, created_at) '
-                'VALUES (?, ?, ?, ?, ?, ?, ?)',
-                (user_id, name_reminder, frequency, ",".join(finalized_dates), ",".join(time_list), 1, datetime.datetime.now(pytz.UTC).isoformat())
-            )
-            await db.commit()
+        reminder_id, next_fire_at = await insert_reminder(
+            user_id, name_reminder, frequency, ",".join(finalized_dates), ",".join(time_list), timezone
+        )
+        reminder_engine.schedule(reminder_id, next_fire_at)
 
         # Calculate when reminder will trigger
         user_tz = pytz.timezone(timezone)
-        first_date_str = finalized_dates[0]
-        first_time_str = time_list[0]
-        reminder_dt = datetime.datetime.strptime(f"{first_date_str} {first_time_str}", f"{FULL_DATE_FORMAT} {TIME_FORMAT}")
-        reminder_dt = user_tz.localize(reminder_dt)
+        if next_fire_at is not None:
+            reminder_dt = datetime.datetime.fromtimestamp(next_fire_at, user_tz)
+        else:
+            reminder_dt = datetime.datetime.strptime(f"{finalized_dates[0]} {time_list[0]}", f"{FULL_DATE_FORMAT} {TIME_FORMAT}")
+            reminder_dt = user_tz.localize(reminder_dt)
+        first_date_str = reminder_dt.strftime(FULL_DATE_FORMAT)
+        first_time_str = reminder_dt.strftime(TIME_FORMAT)
         current_dt_tz = datetime.datetime.now(user_tz)
         time_diff = reminder_dt - current_dt_tz
 
@@ -547,216 +733,306 @@ async def get_time(message: types.Message, state: FSMContext):
         )
 
 
-@router.message(F.text == 'Мои уведомления')
-async def list_reminders(message: types.Message):
-    """List all active reminders with inline buttons and grouping."""
-    user_id = message.from_user.id
-    timezone = await get_user_timezone(user_id)
+def _group_bounds(user_tz: datetime.tzinfo) -> tuple[int, int, int]:
+    """
+    Ends of the list sections as UTC epoch seconds.
 
-    async with aiosqlite.connect(DB_PATH) as db:
+    Returns:
+        Starts of tomorrow, the day after tomorrow and the eighth day from today
+    """
+    today = datetime.datetime.now(user_tz).date()
+    midnights = (
+        datetime.datetime.combine(today + datetime.timedelta(days=days), datetime.time())
+        for days in (1, 2, 8)
+    )
+    return tuple(int(user_tz.localize(midnight).timestamp()) for midnight in midnights)
+
+
+async def _upcoming_dates(
+    db: aiosqlite.Connection,
+    reminder_ids: list[int],
+    now_ts: int,
+    user_tz: datetime.tzinfo
+) -> dict[int, list[str]]:
+    """
+    Get local dates of the next stored occurrences of reminders.
+
+    Args:
+        db: Database connection
+        reminder_ids: Reminders to look up
+        now_ts: Current time as UTC epoch seconds
+        user_tz: Timezone of the owner
+
+    Returns:
+        Distinct dates (DD.MM.YYYY) of up to four occurrences per reminder
+    """
+    placeholders = ",".join("?" * len(reminder_ids))
+    async with db.execute(
+        'SELECT reminder_id, fire_at_utc FROM ('
+        'SELECT reminder_id, fire_at_utc, '
+        'ROW_NUMBER() OVER (PARTITION BY reminder_id ORDER BY fire_at_utc) AS position '
+        f'FROM reminder_occurrences WHERE reminder_id IN ({placeholders}) AND fire_at_utc >= ?'
+        ') WHERE position <= 4 ORDER BY reminder_id, fire_at_utc',
+        (*reminder_ids, now_ts)
+    ) as cursor:
+        occurrences = await cursor.fetchall()
+
+    dates: dict[int, list[str]] = {}
+    for reminder_id, fire_at in occurrences:
+        date = datetime.datetime.fromtimestamp(fire_at, user_tz).strftime(FULL_DATE_FORMAT)
+        reminder_dates = dates.setdefault(reminder_id, [])
+        if date not in reminder_dates:
+            reminder_dates.append(date)
+    return dates
+
+
+def _format_card(
+    name: str,
+    frequency: str,
+    times: str,
+    local_dates: list[str],
+    due_today: bool,
+    max_length: int | None = None
+) -> str:
+    """
+    Format the description of a reminder shown in the list and its card.
+
+    Args:
+        name: Reminder name
+        frequency: Frequency string
+        times: reminders.times
+        local_dates: Upcoming local dates (DD.MM.YYYY)
+        due_today: Whether the next slot is today or already passed
+        max_length: Limit for the name and the times, so a page of cards fits one message
+
+    Returns:
+        Markdown text of the card
+    """
+    if frequency != FREQUENCY_ZERO:
+        emoji = "🔄"
+    elif due_today:
+        emoji = "⏰"
+    else:
+        emoji = "🔔"
+    freq_display = "Не повторяется" if frequency == FREQUENCY_ZERO else f"Повторяется каждые {frequency}"
+
+    return (
+        f"{emoji} *{shorten(name, max_length)}*\n"
+        f"📅 Даты: {', '.join(local_dates[:3])}" + ("..." if len(local_dates) > 3 else "") + "\n"
+        f"🕐 Время: {shorten(_format_times(times), max_length)}\n"
+        f"🔁 {freq_display}"
+    )
+
+
+async def _reminder_page(
+    user_id: int,
+    after: tuple[int, int] | None = None,
+    before: tuple[int, int] | None = None
+) -> tuple[str, InlineKeyboardMarkup] | None:
+    """
+    Build one page of the reminder list.
+
+    Reminders are ordered by their next slot; reminders past their last
+    slot, still awaiting confirmation, come first. Pages are read by
+    keyset: a page button carries the (next slot, id) key of the edge
+    reminder, so a page costs LIST_PAGE_SIZE rows however long the list is.
+    Delete buttons carry the key of the first reminder of the page, so the
+    page can be shown again after a deletion. Sections and their sizes are
+    computed in SQL from the UTC bounds of the user's days.
+
+    Args:
+        user_id: Telegram user ID
+        after: Key of the last reminder of the previous page
+        before: Key of the first reminder of the following page
+
+    Returns:
+        Tuple of (text, inline keyboard), or None if the page is empty
+    """
+    if before is not None:
+        condition, order, key = '<', 'DESC', before
+    else:
+        condition, order, key = '>', 'ASC', after or (-1, 0)
+
+    user_tz = await get_user_tzinfo(user_id)
+    now_ts = int(datetime.datetime.now(pytz.UTC).timestamp())
+    bounds = _group_bounds(user_tz)
+    section = (
+        'CASE WHEN COALESCE(next_fire_at, 0) < ? THEN 0 WHEN COALESCE(next_fire_at, 0) < ? THEN 1 '
+        'WHEN COALESCE(next_fire_at, 0) < ? THEN 2 ELSE 3 END'
+    )
+
+    async with get_reader() as db:
+        # The plain bound on the next slot lets SQLite seek the index;
+        # the row value comparison then breaks ties by id
         async with db.execute(
-            'SELECT id, name_reminder, frequency, dates, times, active '
-            'FROM reminders WHERE user_id = ? AND active = 1',
-            (user_id,)
+            f'SELECT id, name_reminder, frequency, dates, times, COALESCE(next_fire_at, 0), {section} '
+            f'FROM reminders WHERE user_id = ? AND active = 1 '
+            f'AND COALESCE(next_fire_at, 0) {condition}= ? '
+            f'AND (COALESCE(next_fire_at, 0), id) {condition} (?, ?) '
+            f'ORDER BY COALESCE(next_fire_at, 0) {order}, id {order} LIMIT ?',
+            (*bounds, user_id, key[0], *key, LIST_PAGE_SIZE + 1)
         ) as cursor:
             reminders = await cursor.fetchall()
+        if not reminders:
+            return None
+
+        # One extra row tells whether there is a page beyond this one
+        has_more = len(reminders) > LIST_PAGE_SIZE
+        reminders = reminders[:LIST_PAGE_SIZE]
+        if before is not None:
+            reminders.reverse()
+            has_prev, has_next = has_more, True
+        else:
+            has_prev, has_next = after is not None, has_more
 
-    if not reminders:
-        await message.answer("У вас нет активных уведомлений.")
-        return
+        # Section sizes cost a pass over the user's reminders, so only the first page shows them
+        group_counts = None
+        if not has_prev:
+            async with db.execute(
+                f'SELECT {section}, COUNT(*) FROM reminders WHERE user_id = ? AND active = 1 GROUP BY 1',
+                (*bounds, user_id)
+            ) as cursor:
+                group_counts = dict(await cursor.fetchall())
+
+        upcoming = await _upcoming_dates(db, [reminder[0] for reminder in reminders], now_ts, user_tz)
+
+    anchor = f"_{reminders[0][5]}_{reminders[0][0]}" if has_prev else ""
+    lines = []
+    group = None
+    delete_buttons = []
+    for number, (reminder_id, name, frequency, dates, times, _, reminder_group) in enumerate(reminders, start=1):
+        if reminder_group != group:
+            group = reminder_group
+            header = f"*{LIST_GROUPS[group]}*"
+            lines.append(f"{header} ({group_counts[group]})" if group_counts else header)
+
+        # Reminders past their last slot show the dates they were set for
+        local_dates = upcoming.get(reminder_id) or dates.split(",")
+        lines.append(
+            f"{number}. " + _format_card(name, frequency, times, local_dates, group == 0, LIST_TEXT_LENGTH)
+        )
+        delete_buttons.append((f"🗑️ {number}", f"delete_confirm_{reminder_id}_{number}{anchor}"))
+
+    buttons = [delete_buttons[i:i + 5] for i in range(0, len(delete_buttons), 5)]
+    pager = []
+    if has_prev:
+        pager.append(("◀️ Назад", f"list_prev_{reminders[0][5]}_{reminders[0][0]}"))
+    if has_next:
+        pager.append(("Вперед ▶️", f"list_next_{reminders[-1][5]}_{reminders[-1][0]}"))
+    if pager:
+        buttons.append(pager)
+
+    title = "📋 *Мои уведомления*"
+    if group_counts:
+        title += f" ({sum(group_counts.values())})"
+    text = title + "\n\n" + "\n\n".join(lines)
+    return text, create_inline_keyboard(buttons)
+
+
+async def _edit_reminder_page(
+    callback: types.CallbackQuery,
+    page: tuple[str, InlineKeyboardMarkup] | None
+):
+    """Show a list page in the callback's message, or the first page if it is empty."""
+    # Reminders may have been deleted since the page was shown
+    if page is None:
+        page = await _reminder_page(callback.from_user.id)
+    if page is None:
+        await callback.message.edit_text("У вас нет активных уведомлений.")
+    else:
+        text, markup = page
+        await callback.message.edit_text(text, reply_markup=markup, parse_mode="Markdown")
 
-    user_tz = pytz.timezone(timezone)
-    current_dt = datetime.datetime.now(user_tz)
-    today = current_dt.date()
-    tomorrow = today + datetime.timedelta(days=1)
-    week_end = today + datetime.timedelta(days=7)
-
-    # Group reminders by time category
-    groups = {
-        "Сегодня": [],
-        "Завтра": [],
-        "На этой неделе": [],
-        "Позже": []
-    }
 
-    for reminder in reminders:
-        reminder_id, name, frequency, dates, times, active = reminder
-        date_list = dates.split(",")
+async def _show_page_again(callback: types.CallbackQuery, anchor: list[str]):
+    """
+    Show the list page a delete button was pressed on again.
 
-        # Find nearest date
-        nearest_date = None
-        for date_str in date_list:
-            date_dt = datetime.datetime.strptime(date_str, FULL_DATE_FORMAT)
-            date_local = date_dt.astimezone(user_tz).date()
-            if nearest_date is None or date_local < nearest_date:
-                nearest_date = date_local
-
-        # Determine emoji based on frequency and proximity
-        if frequency != FREQUENCY_ZERO:
-            emoji = "🔄"
-        elif nearest_date == today:
-            emoji = "⏰"
-        else:
-            emoji = "🔔"
+    Args:
+        callback: Callback of the delete dialog
+        anchor: Key of the first reminder of the page from the callback data, empty for the first page
+    """
+    user_id = callback.from_user.id
+    page = None
+    if anchor:
+        next_fire_at, first_id = int(anchor[0]), int(anchor[1])
+        # Ids are integers, so the key just before the first reminder starts the page at it
+        page = await _reminder_page(user_id, after=(next_fire_at, first_id - 1))
+        if page is None:
+            page = await _reminder_page(user_id, before=(next_fire_at, first_id))
+    await _edit_reminder_page(callback, page)
 
-        reminder_data = (reminder_id, name, frequency, dates, times, nearest_date, emoji)
 
-        # Categorize reminder
-        if nearest_date == today:
-            groups["Сегодня"].append(reminder_data)
-        elif nearest_date == tomorrow:
-            groups["Завтра"].append(reminder_data)
-        elif nearest_date <= week_end:
-            groups["На этой неделе"].append(reminder_data)
-        else:
-            groups["Позже"].append(reminder_data)
-
-    # Send reminders grouped
-    for group_name, group_reminders in groups.items():
-        if not group_reminders:
-            continue
-
-        header = f"*{group_name}*\n\n"
-        await message.answer(header, parse_mode="Markdown")
-
-        for reminder_id, name, frequency, dates, times, nearest_date, emoji in group_reminders:
-            date_list = dates.split(",")
-            local_dates = []
-            for date in date_list:
-                date_dt = datetime.datetime.strptime(date, FULL_DATE_FORMAT)
-                date_local = date_dt.astimezone(user_tz).strftime(FULL_DATE_FORMAT)
-                if date_local not in local_dates:
-                    local_dates.append(date_local)
-
-            # Format frequency for display
-            freq_display = "Не повторяется" if frequency == FREQUENCY_ZERO else f"Повторяется каждые {frequency}"
-
-            card_text = (
-                f"{emoji} *{name}*\n"
-                f"📅 Даты: {', '.join(local_dates[:3])}" + ("..." if len(local_dates) > 3 else "") + "\n"
-                f"🕐 Время: {times}\n"
-                f"🔁 {freq_display}"
-            )
+@router.message(F.text == 'Мои уведомления')
+async def list_reminders(message: types.Message):
+    """List active reminders page by page in a single message."""
+    page = await _reminder_page(message.from_user.id)
+    if page is None:
+        await message.answer("У вас нет активных уведомлений.")
+        return
 
-            # Create inline buttons for each reminder
-            inline_keyboard = [
-                [
-                    InlineKeyboardButton(text="✏️ Редактировать", callback_data=f"edit_{reminder_id}"),
-                    InlineKeyboardButton(text="🗑️ Удалить", callback_data=f"delete_confirm_{reminder_id}")
-                ]
-            ]
-            markup = InlineKeyboardMarkup(inline_keyboard=inline_keyboard)
+    text, markup = page
+    await message.answer(text, reply_markup=markup, parse_mode="Markdown")
 
-            await message.answer(card_text, reply_markup=markup, parse_mode="Markdown")
+
+@router.callback_query(lambda c: c.data.startswith(("list_prev_", "list_next_")))
+async def switch_reminder_page(callback: types.CallbackQuery):
+    """Show another page of the reminder list in the same message."""
+    _, direction, next_fire_at, reminder_id = callback.data.split("_")
+    key = (int(next_fire_at), int(reminder_id))
+    if direction == "prev":
+        page = await _reminder_page(callback.from_user.id, before=key)
+    else:
+        page = await _reminder_page(callback.from_user.id, after=key)
+
+    await _edit_reminder_page(callback, page)
+    await callback.answer()
 
 
 @router.callback_query(lambda c: c.data.startswith("delete_confirm_"))
 async def delete_confirmation(callback: types.CallbackQuery):
-    """Show delete confirmation dialog."""
-    reminder_id = int(callback.data.split("_")[2])
+    """Show delete confirmation buttons under the list page."""
+    _, _, reminder_id, *page = callback.data.split("_")
+    # Buttons of older list messages carry only the reminder id
+    number, anchor = (page[0], page[1:]) if page else ("", [])
+    page_key = "".join(f"_{part}" for part in anchor)
 
-    # Create confirmation buttons
+    # Create confirmation buttons; the page stays visible above them
     inline_keyboard = [
         [
-            InlineKeyboardButton(text="✅ Да, удалить", callback_data=f"delete_yes_{reminder_id}"),
-            InlineKeyboardButton(text="❌ Отменить", callback_data=f"delete_no_{reminder_id}")
+            InlineKeyboardButton(
+                text="✅ Да, удалить", callback_data=f"delete_yes_{reminder_id}{page_key}"
+            ),
+            InlineKeyboardButton(text="❌ Отменить", callback_data=f"delete_no_{reminder_id}{page_key}")
         ]
     ]
     markup = InlineKeyboardMarkup(inline_keyboard=inline_keyboard)
 
-    await callback.message.edit_text(
-        "Вы уверены, что хотите удалить это напоминание?",
-        reply_markup=markup
-    )
-    await callback.answer()
+    await callback.message.edit_reply_markup(reply_markup=markup)
+    await callback.answer(f"Удалить напоминание {number}?" if number else "Удалить это напоминание?")
 
 
 @router.callback_query(lambda c: c.data.startswith("delete_yes_"))
 async def delete_reminder_confirmed(callback: types.CallbackQuery):
-    """Delete reminder after confirmation."""
-    reminder_id = int(callback.data.split("_")[2])
+    """Delete reminder after confirmation and show its list page again."""
+    _, _, reminder_id, *anchor = callback.data.split("_")
+    reminder_id = int(reminder_id)
     user_id = callback.from_user.id
 
-    async with aiosqlite.connect(DB_PATH) as db:
-        # Get reminder info before deleting for history
-        async with db.execute(
-            'SELECT name_reminder, frequency, dates, times FROM reminders WHERE id = ? AND user_id = ?',
-            (reminder_id, user_id)
-        ) as cursor:
-            reminder_info = await cursor.fetchone()
-
-        if not reminder_info:
-            await callback.message.edit_text("Напоминание не найдено.")
-            await callback.answer()
-            return
-
-        name, frequency, dates, times = reminder_info
-
-        # Save to history
-        completed_at = datetime.datetime.now(pytz.UTC).isoformat()
-        await db.execute(
-            'INSERT INTO reminder_history (reminder_id, user_id, name_reminder, frequency, dates, times, completed_at, action) '
-            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
-            (reminder_id, user_id, name, frequency, dates, times, completed_at, 'deleted')
-        )
-
-        # Delete reminder
-        await db.execute(
-            'DELETE FROM reminders WHERE id = ? AND user_id = ?',
-            (reminder_id, user_id)
-        )
-        await db.commit()
+    # Save to history and delete reminder
+    reminder_info = await archive_reminder(reminder_id, user_id)
+    if reminder_info:
+        reminder_engine.cancel(reminder_id)
 
-    await callback.message.edit_text("✅ Напоминание успешно удалено.")
-    await callback.answer()
+    await _show_page_again(callback, anchor)
+    await callback.answer("✅ Напоминание удалено" if reminder_info else "Напоминание не найдено")
 
 
 @router.callback_query(lambda c: c.data.startswith("delete_no_"))
 async def delete_reminder_cancelled(callback: types.CallbackQuery):
-    """Cancel reminder deletion."""
-    reminder_id = int(callback.data.split("_")[2])
-    user_id = callback.from_user.id
-
-    async with aiosqlite.connect(DB_PATH) as db:
-        async with db.execute(
-            'SELECT name_reminder, frequency, dates, times FROM reminders WHERE id = ? AND user_id = ?',
-            (reminder_id, user_id)
-        ) as cursor:
-            reminder_info = await cursor.fetchone()
-
-    if reminder_info:
-        name, frequency, dates, times = reminder_info
-        timezone = await get_user_timezone(user_id)
-        user_tz = pytz.timezone(timezone)
-
-        date_list = dates.split(",")
-        local_dates = []
-        for date in date_list:
-            date_dt = datetime.datetime.strptime(date, FULL_DATE_FORMAT)
-            date_local = date_dt.astimezone(user_tz).strftime(FULL_DATE_FORMAT)
-            if date_local not in local_dates:
-                local_dates.append(date_local)
-
-        emoji = "🔄" if frequency != FREQUENCY_ZERO else "🔔"
-        freq_display = "Не повторяется" if frequency == FREQUENCY_ZERO else f"Повторяется каждые {frequency}"
-
-        card_text = (
-            f"{emoji} *{name}*\n"
-            f"📅 Даты: {', '.join(local_dates[:3])}" + ("..." if len(local_dates) > 3 else "") + "\n"
-            f"🕐 Время: {times}\n"
-            f"🔁 {freq_display}"
-        )
-
-        inline_keyboard = [
-            [
-                InlineKeyboardButton(text="✏️ Редактировать", callback_data=f"edit_{reminder_id}"),
-                InlineKeyboardButton(text="🗑️ Удалить", callback_data=f"delete_confirm_{reminder_id}")
-            ]
-        ]
-        markup = InlineKeyboardMarkup(inline_keyboard=inline_keyboard)
-
-        await callback.message.edit_text(card_text, reply_markup=markup, parse_mode="Markdown")
-
+    """Cancel reminder deletion and restore the list page."""
+    _, _, _, *anchor = callback.data.split("_")
+    await _show_page_again(callback, anchor)
     await callback.answer("Удаление отменено")
 
 
@@ -770,19 +1046,18 @@ async def handle_delete_command(message: types.Message):
         return
 
     user_id = message.from_user.id
-    async with aiosqlite.connect(DB_PATH) as db:
-        async with db.execute(
-            'SELECT 1 FROM reminders WHERE id = ? AND user_id = ?',
-            (reminder_id, user_id)
-        ) as cursor:
-            if not await cursor.fetchone():
-                await message.answer("Напоминание не найдено или не принадлежит вам.")
-                return
-        await db.execute(
+
+    async def delete_owned(db: aiosqlite.Connection) -> int:
+        cursor = await db.execute(
             'DELETE FROM reminders WHERE id = ? AND user_id = ?',
             (reminder_id, user_id)
         )
-        await db.commit()
+        return cursor.rowcount
+
+    if not await run_write(delete_owned):
+        await message.answer("Напоминание не найдено или не принадлежит вам.")
+        return
+    reminder_engine.cancel(reminder_id)
 
     await message.answer("✅ Напоминание успешно удалено.")
 
@@ -933,6 +1208,13 @@ async def confirm_calendar_dates(callback: types.CallbackQuery, state: FSMContex
     # Sort dates
     selected_dates_sorted = sorted(selected_dates_str, key=lambda x: datetime.datetime.strptime(x, FULL_DATE_FORMAT))
 
+    if data.get('window'):
+        await _add_window_reminder(
+            callback.bot, callback.message.chat.id, callback.from_user.id, data, selected_dates_sorted, state
+        )
+        await callback.answer("Напоминание создано!")
+        return
+
     await state.update_data(dates=",".join(selected_dates_sorted))
     bot_message_id = data['bot_message_id']
     name_reminder = data['name_reminder']
@@ -952,6 +1234,37 @@ async def confirm_calendar_dates(callback: types.CallbackQuery, state: FSMContex
     await callback.answer()
 
 
+def _replace_digest_row(
+    markup: InlineKeyboardMarkup | None,
+    reminder_id: int,
+    text: str
+) -> InlineKeyboardMarkup | None:
+    """
+    Replace the buttons of one reminder in a digest message.
+
+    Args:
+        markup: Keyboard of the message the button was pressed in
+        reminder_id: Reminder the button belongs to
+        text: Text of the button that replaces the row
+
+    Returns:
+        New keyboard, or None if the message is not a digest of several reminders
+    """
+    if markup is None:
+        return None
+
+    # Buttons of reminder messages end with the reminder ID
+    row_ids = [row[0].callback_data.rsplit("_", 1)[-1] for row in markup.inline_keyboard]
+    if len(set(row_ids)) < 2:
+        return None
+
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text=text, callback_data=f"doned_{reminder_id}")]
+        if row_id == str(reminder_id) else row
+        for row, row_id in zip(markup.inline_keyboard, row_ids)
+    ])
+
+
 @router.callback_query(lambda c: c.data.startswith("snooze_"))
 async def handle_snooze(callback: types.CallbackQuery):
     """Handle snooze button clicks."""
@@ -960,128 +1273,106 @@ async def handle_snooze(callback: types.CallbackQuery):
     reminder_id = int(parts[2])
     user_id = callback.from_user.id
 
-    async with aiosqlite.connect(DB_PATH) as db:
-        # Get reminder info
+    # Get reminder info
+    async with get_reader() as db:
         async with db.execute(
-            'SELECT name_reminder, expiration_time FROM reminders WHERE id = ? AND user_id = ?',
+            'SELECT name_reminder FROM reminders WHERE id = ? AND user_id = ?',
             (reminder_id, user_id)
         ) as cursor:
             reminder_info = await cursor.fetchone()
 
-        if not reminder_info:
-            await callback.answer("Напоминание не найдено.")
-            return
+    if not reminder_info:
+        await callback.answer("Напоминание не найдено.")
+        return
 
-        name, expiration_time = reminder_info
-        timezone = await get_user_timezone(user_id)
-        user_tz = pytz.timezone(timezone)
-        current_dt = datetime.datetime.now(user_tz)
-
-        # Calculate snooze time
-        if snooze_type == "5":
-            snooze_dt = current_dt + datetime.timedelta(minutes=5)
-            snooze_text = "5 минут"
-        elif snooze_type == "15":
-            snooze_dt = current_dt + datetime.timedelta(minutes=15)
-            snooze_text = "15 минут"
-        elif snooze_type == "60":
-            snooze_dt = current_dt + datetime.timedelta(hours=1)
-            snooze_text = "1 час"
-        elif snooze_type == "tomorrow":
-            snooze_dt = (current_dt + datetime.timedelta(days=1)).replace(hour=9, minute=0, second=0, microsecond=0)
-            snooze_text = "завтра в 9:00"
-        else:
-            await callback.answer("Неизвестный тип отложения.")
-            return
+    name = reminder_info[0]
+    user_tz = await get_user_tzinfo(user_id)
+    current_dt = datetime.datetime.now(user_tz)
 
-        new_date = snooze_dt.strftime(FULL_DATE_FORMAT)
-        new_time = snooze_dt.strftime(TIME_FORMAT)
+    # Calculate snooze time
+    if snooze_type == "5":
+        snooze_dt = current_dt + datetime.timedelta(minutes=5)
+        snooze_text = "5 минут"
+    elif snooze_type == "15":
+        snooze_dt = current_dt + datetime.timedelta(minutes=15)
+        snooze_text = "15 минут"
+    elif snooze_type == "60":
+        snooze_dt = current_dt + datetime.timedelta(hours=1)
+        snooze_text = "1 час"
+    elif snooze_type == "tomorrow":
+        snooze_dt = (current_dt + datetime.timedelta(days=1)).replace(hour=9, minute=0, second=0, microsecond=0)
+        snooze_text = "завтра в 9:00"
+    else:
+        await callback.answer("Неизвестный тип отложения.")
+        return
 
-        # Update reminder with new date/time
-        await db.execute(
-            'UPDATE reminders SET dates = ?, times = ? WHERE id = ? AND user_id = ?',
-            (new_date, new_time, reminder_id, user_id)
-        )
-        await db.commit()
+    # Move the next follow-up of the reminder, its own schedule stays as is
+    snooze_at = int(snooze_dt.replace(second=0, microsecond=0).timestamp())
+    wake_at = await snooze_reminder(reminder_id, user_id, snooze_at)
+    if wake_at is None:
+        await callback.answer("Напоминание не найдено.")
+        return
+    reminder_engine.schedule(reminder_id, wake_at)
 
-    await callback.message.edit_text(
-        f"✅ Напоминание '*{name}*' отложено на {snooze_text}",
-        parse_mode="Markdown"
+    digest_markup = _replace_digest_row(
+        callback.message.reply_markup, reminder_id, f"⏰ {name}: {snooze_text}"
     )
+    if digest_markup:
+        await callback.message.edit_reply_markup(reply_markup=digest_markup)
+    else:
+        await callback.message.edit_text(
+            f"✅ Напоминание '*{name}*' отложено на {snooze_text}",
+            parse_mode="Markdown"
+        )
     await callback.answer(f"Отложено на {snooze_text}")
 
 
 @router.callback_query(lambda c: c.data.startswith(("delete_", "last_")))
 async def delete_new_reminder(callback: types.CallbackQuery):
-    """Mark reminder as done or delete temporary reminder."""
+    """Mark reminder as done and stop its follow-ups."""
     callback_data = callback.data
 
     if callback_data.startswith("last_"):
-        # For last temporary reminder, just change button to "doned ✅"
+        # For last follow-up, just change button to "doned ✅"
         reminder_id = int(callback_data.split("_")[1])
 
         # Save to history
         user_id = callback.from_user.id
-        async with aiosqlite.connect(DB_PATH) as db:
-            async with db.execute(
-                'SELECT name_reminder, frequency, dates, times FROM reminders WHERE id = ? AND user_id = ?',
-                (reminder_id, user_id)
-            ) as cursor:
-                reminder_info = await cursor.fetchone()
-
-            if reminder_info:
-                name, frequency, dates, times = reminder_info
-                completed_at = datetime.datetime.now(pytz.UTC).isoformat()
-                await db.execute(
-                    'INSERT INTO reminder_history (reminder_id, user_id, name_reminder, frequency, dates, times, completed_at, action) '
-                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
-                    (reminder_id, user_id, name, frequency, dates, times, completed_at, 'completed')
-                )
-                await db.commit()
-
-        inline_button_doned = InlineKeyboardButton(
-            text="✅ Выполнено",
-            callback_data=f"doned_{reminder_id}"
+        result = await complete_reminder(reminder_id, user_id)
+        if not result:
+            await callback.answer("Напоминание не найдено.")
+            return
+        reminder_engine.schedule(reminder_id, result[1])
+
+        inline_markup_doned = _replace_digest_row(
+            callback.message.reply_markup, reminder_id, f"✅ {result[0][0]}"
         )
-        inline_markup_doned = InlineKeyboardMarkup(inline_keyboard=[[inline_button_doned]])
+        if not inline_markup_doned:
+            inline_button_doned = InlineKeyboardButton(
+                text="✅ Выполнено",
+                callback_data=f"doned_{reminder_id}"
+            )
+            inline_markup_doned = InlineKeyboardMarkup(inline_keyboard=[[inline_button_doned]])
         await callback.message.edit_reply_markup(reply_markup=inline_markup_doned)
         await callback.answer("Напоминание отмечено как выполненное.")
     else:
-        # Delete temporary reminder from database
+        # Stop follow-ups, one-off reminders are deleted
         new_reminder_id = int(callback_data.split("_")[1])
-        async with aiosqlite.connect(DB_PATH) as db:
-            # Get reminder info for history
-            async with db.execute(
-                'SELECT name_reminder, frequency, dates, times FROM reminders WHERE id = ? AND user_id = ?',
-                (new_reminder_id, callback.from_user.id)
-            ) as cursor:
-                reminder_info = await cursor.fetchone()
-
-            if not reminder_info:
-                await callback.answer("Напоминание не найдено.")
-                return
-
-            name, frequency, dates, times = reminder_info
-
-            # Save to history
-            completed_at = datetime.datetime.now(pytz.UTC).isoformat()
-            await db.execute(
-                'INSERT INTO reminder_history (reminder_id, user_id, name_reminder, frequency, dates, times, completed_at, action) '
-                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
-                (new_reminder_id, callback.from_user.id, name, frequency, dates, times, completed_at, 'completed')
-            )
-
-            await db.execute(
-                'DELETE FROM reminders WHERE id = ? AND user_id = ?',
-                (new_reminder_id, callback.from_user.id)
-            )
-            await db.commit()
+        result = await complete_reminder(new_reminder_id, callback.from_user.id)
+        if not result:
+            await callback.answer("Напоминание не найдено.")
+            return
+        reminder_engine.schedule(new_reminder_id, result[1])
 
-        inline_button_doned = InlineKeyboardButton(
-            text="✅ Выполнено",
-            callback_data=f"doned_{new_reminder_id}"
+        inline_markup_doned = _replace_digest_row(
+            callback.message.reply_markup, new_reminder_id, f"✅ {result[0][0]}"
         )
-        inline_markup_doned = InlineKeyboardMarkup(inline_keyboard=[[inline_button_doned]])
+        if not inline_markup_doned:
+            inline_button_doned = InlineKeyboardButton(
+                text="✅ Выполнено",
+                callback_data=f"doned_{new_reminder_id}"
+            )
+            inline_markup_doned = InlineKeyboardMarkup(inline_keyboard=[[inline_button_doned]])
         await callback.message.edit_reply_markup(reply_markup=inline_markup_doned)
         await callback.answer("Напоминание успешно выполнено.")
 
@@ -1090,45 +1381,43 @@ async def delete_new_reminder(callback: types.CallbackQuery):
 async def show_history(message: types.Message):
     """Show reminder history and statistics."""
     user_id = message.from_user.id
-    timezone = await get_user_timezone(user_id)
-    user_tz = pytz.timezone(timezone)
+    user_tz = await get_user_tzinfo(user_id)
 
-    async with aiosqlite.connect(DB_PATH) as db:
-        # Get statistics for the past week
-        week_ago = (datetime.datetime.now(user_tz) - datetime.timedelta(days=7)).isoformat()
-
-        async with db.execute(
-            'SELECT COUNT(*) FROM reminder_history WHERE user_id = ? AND completed_at >= ?',
-            (user_id, week_ago)
-        ) as cursor:
-            week_count = (await cursor.fetchone())[0]
+    today = datetime.datetime.now(user_tz).date()
+    week_start = (today - datetime.timedelta(days=6)).isoformat()
 
+    # Rolled-up statistics together with the last 10 actions, one row per action
+    async with get_reader() as db:
         async with db.execute(
-            'SELECT COUNT(*) FROM reminder_history WHERE user_id = ? AND action = "completed"',
-            (user_id,)
+            'SELECT s.completed, s.deleted, s.current_streak, s.best_streak, s.last_completed_day, '
+            '(SELECT COALESCE(SUM(d.completed + d.deleted), 0) FROM history_daily d '
+            'WHERE d.user_id = s.user_id AND d.day >= ?), '
+            'h.name_reminder, h.completed_at, h.action '
+            'FROM history_stats s LEFT JOIN ('
+            'SELECT name_reminder, completed_at, action FROM reminder_history '
+            'WHERE user_id = ? ORDER BY completed_at DESC LIMIT 10'
+            ') h ON 1 WHERE s.user_id = ? ORDER BY h.completed_at DESC',
+            (week_start, user_id, user_id)
         ) as cursor:
-            total_completed = (await cursor.fetchone())[0]
+            rows = await cursor.fetchall()
 
-        async with db.execute(
-            'SELECT COUNT(*) FROM reminder_history WHERE user_id = ?',
-            (user_id,)
-        ) as cursor:
-            total_count = (await cursor.fetchone())[0]
+    total_completed, total_deleted, current_streak, best_streak, last_completed_day, week_count = (
+        rows[0][:6] if rows else (0, 0, 0, 0, None, 0)
+    )
+    history_items = [row[6:] for row in rows if row[6] is not None]
 
-        # Get recent history (last 10 items)
-        async with db.execute(
-            'SELECT name_reminder, completed_at, action FROM reminder_history '
-            'WHERE user_id = ? ORDER BY completed_at DESC LIMIT 10',
-            (user_id,)
-        ) as cursor:
-            history_items = await cursor.fetchall()
+    # A streak is broken once a whole day passed without a completed reminder
+    yesterday = (today - datetime.timedelta(days=1)).isoformat()
+    if last_completed_day is None or last_completed_day < yesterday:
+        current_streak = 0
 
     # Send statistics
     stats_text = (
         "📊 *Ваша статистика*\n\n"
         f"За последнюю неделю: {week_count} напоминаний\n"
         f"Всего выполнено: {total_completed}\n"
-        f"Всего действий: {total_count}\n"
+        f"Всего действий: {total_completed + total_deleted}\n"
+        f"Дней подряд с выполненными: {current_streak} (рекорд: {best_streak})\n"
     )
 
     await message.answer(stats_text, parse_mode="Markdown")
@@ -1141,8 +1430,12 @@ async def show_history(message: types.Message):
             completed_dt = datetime.datetime.fromisoformat(completed_at).astimezone(user_tz)
             date_str = completed_dt.strftime("%d.%m.%Y %H:%M")
 
-            action_emoji = "✅" if action == "completed" else "🗑️"
-            action_text = "выполнено" if action == "completed" else "удалено"
+            if action == "completed":
+                action_emoji, action_text = "✅", "выполнено"
+            elif action == "missed":
+                action_emoji, action_text = "⏰", "пропущено, бот был недоступен"
+            else:
+                action_emoji, action_text = "🗑️", "удалено"
 
             history_text += f"{action_emoji} *{name}* - {action_text}\n📅 {date_str}\n\n"
 
@@ -0,0 +1,76 @@
+"""User settings handlers."""
+
+from aiogram import Router, types, F
+from aiogram.types import InlineKeyboardMarkup
+
+from bot.database import get_reader, execute_write
+from bot.keyboards import create_inline_keyboard
+
+router = Router()
+
+
+async def _settings_view(user_id: int) -> tuple[str, InlineKeyboardMarkup]:
+    """
+    Build the settings message of a user.
+
+    Args:
+        user_id: Telegram user ID
+
+    Returns:
+        Tuple of (text, inline keyboard with toggles)
+    """
+    async with get_reader() as db:
+        async with db.execute(
+            'SELECT digest_mode, nag_ping FROM users WHERE user_id = ?',
+            (user_id,)
+        ) as cursor:
+            result = await cursor.fetchone()
+            digest_mode, nag_ping = result if result else (0, 1)
+
+    text = (
+        "⚙️ *Настройки*\n\n"
+        "*Сводка* - напоминания, сработавшие одновременно, "
+        "приходят одним сообщением с кнопками для каждого.\n\n"
+        "*Повторы* - повтор невыполненного напоминания приходит новым сообщением "
+        "с уведомлением или обновляет прежнее сообщение без звука."
+    )
+    markup = create_inline_keyboard([
+        [(f"📦 Сводка: {'вкл' if digest_mode else 'выкл'}", "settings_digest")],
+        [(f"🔁 Повторы: {'новым сообщением' if nag_ping else 'обновлять сообщение'}", "settings_nag_ping")]
+    ])
+    return text, markup
+
+
+@router.message(F.text == '⚙️ Настройки')
+async def show_settings(message: types.Message):
+    """Show user settings."""
+    text, markup = await _settings_view(message.from_user.id)
+    await message.answer(text, reply_markup=markup, parse_mode="Markdown")
+
+
+@router.callback_query(lambda c: c.data == "settings_digest")
+async def toggle_digest_mode(callback: types.CallbackQuery):
+    """Turn digest mode on or off."""
+    user_id = callback.from_user.id
+    await execute_write(
+        'UPDATE users SET digest_mode = 1 - digest_mode WHERE user_id = ?',
+        (user_id,)
+    )
+
+    text, markup = await _settings_view(user_id)
+    await callback.message.edit_text(text, reply_markup=markup, parse_mode="Markdown")
+    await callback.answer()
+
+
+@router.callback_query(lambda c: c.data == "settings_nag_ping")
+async def toggle_nag_ping(callback: types.CallbackQuery):
+    """Switch follow-ups between fresh messages and edits of the previous one."""
+    user_id = callback.from_user.id
+    await execute_write(
+        'UPDATE users SET nag_ping = 1 - nag_ping WHERE user_id = ?',
+        (user_id,)
+    )
+
+    text, markup = await _settings_view(user_id)
+    await callback.message.edit_text(text, reply_markup=markup, parse_mode="Markdown")
+    await callback.answer()
@@ -1,13 +1,13 @@
 """Start command handler."""
 
-import aiosqlite
 from aiogram import Router, types
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 
-from bot.config import CITY_TIMEZONES, DB_PATH
-from bot.database import get_user_timezone
+from bot.config import CITY_TIMEZONES
+from bot.database import get_user_profile, complete_onboarding, reactivate_user
 from bot.keyboards import keyboard, create_inline_keyboard
+from bot.services import reminder_engine
 from bot.states import ReminderStates
 
 router = Router()
@@ -17,16 +17,14 @@ router = Router()
 async def start(message: types.Message, state: FSMContext):
     """Handle /start command with onboarding."""
     user_id = message.from_user.id
-    timezone = await get_user_timezone(user_id)
+    profile = await get_user_profile(user_id)
+    timezone = profile.timezone if profile else None
+    onboarding_completed = profile.onboarding_completed if profile else False
 
-    # Check if user completed onboarding
-    async with aiosqlite.connect(DB_PATH) as db:
-        async with db.execute(
-            'SELECT onboarding_completed FROM users WHERE user_id = ?',
-            (user_id,)
-        ) as cursor:
-            result = await cursor.fetchone()
-            onboarding_completed = result[0] if result else 0
+    # A user coming back after blocking the bot gets their reminders back
+    if timezone is not None and profile.status != 'active':
+        for reminder_id, wake_at in await reactivate_user(user_id, timezone):
+            reminder_engine.schedule(reminder_id, wake_at)
 
     if timezone is None:
         # Show welcome message with timezone selection
@@ -84,12 +82,7 @@ async def tutorial_create(callback: types.CallbackQuery, state: FSMContext):
     user_id = callback.from_user.id
 
     # Mark onboarding as completed
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute(
-            'UPDATE users SET onboarding_completed = 1 WHERE user_id = ?',
-            (user_id,)
-        )
-        await db.commit()
+    await complete_onboarding(user_id)
 
     await callback.message.edit_text(
         "Отлично! Давайте создадим ваше первое напоминание.\n\n"
@@ -106,12 +99,7 @@ async def tutorial_skip(callback: types.CallbackQuery, state: FSMContext):
     user_id = callback.from_user.id
 
     # Mark onboarding as completed
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute(
-            'UPDATE users SET onboarding_completed = 1 WHERE user_id = ?',
-            (user_id,)
-        )
-        await db.commit()
+    await complete_onboarding(user_id)
 
     await callback.message.edit_text("Хорошо! Вы всегда можете вызвать /start для справки.")
     await callback.message.answer("Выбери действие:", reply_markup=keyboard)
@@ -1,11 +1,12 @@
 """Timezone selection handlers."""
 
-import aiosqlite
 from aiogram import Router, types, F
 from aiogram.fsm.context import FSMContext
 
-from bot.config import CITY_TIMEZONES, DB_PATH
+from bot.config import CITY_TIMEZONES
+from bot.database import refresh_next_fire_at, set_user_timezone
 from bot.keyboards import keyboard, create_inline_keyboard
+from bot.services import reminder_engine
 from bot.states import ReminderStates
 
 router = Router()
@@ -37,25 +38,11 @@ async def select_city(callback: types.CallbackQuery, state: FSMContext):
     data = await state.get_data()
     is_onboarding = data.get('is_onboarding', False)
 
-    async with aiosqlite.connect(DB_PATH) as db:
-        # Check if user exists
-        async with db.execute(
-            'SELECT user_id FROM users WHERE user_id = ?',
-            (user_id,)
-        ) as cursor:
-            user_exists = await cursor.fetchone()
-
-        if user_exists:
-            await db.execute(
-                'UPDATE users SET timezone = ? WHERE user_id = ?',
-                (timezone, user_id)
-            )
-        else:
-            await db.execute(
-                'INSERT INTO users (user_id, timezone, onboarding_completed) VALUES (?, ?, ?)',
-                (user_id, timezone, 0)
-            )
-        await db.commit()
+    await set_user_timezone(user_id, timezone)
+
+    # Reminder slots are local times, so their UTC fire times move with the timezone
+    for reminder_id, next_fire_at in await refresh_next_fire_at(user_id, timezone):
+        reminder_engine.schedule(reminder_id, next_fire_at)
 
     if is_onboarding:
         # Show tutorial after first timezone selection
@@ -31,9 +31,10 @@ button_add = KeyboardButton(text='+')
 button_list = KeyboardButton(text='Мои уведомления')
 button_history = KeyboardButton(text='📊 История')
 button_setcity = KeyboardButton(text='Изменить часовой пояс')
+button_settings = KeyboardButton(text='⚙️ Настройки')
 
 keyboard = ReplyKeyboardMarkup(
-    keyboard=[[button_add, button_list], [button_history, button_setcity]],
+    keyboard=[[button_add, button_list], [button_history, button_setcity], [button_settings]],
     resize_keyboard=True
 )
 
@@ -63,6 +64,8 @@ frequency_preset_buttons = [
     [("📅 Каждый день", "freq_1d"), ("📅 Каждую неделю", "freq_7d")],
     [("📅 Каждый месяц", "freq_30d"), ("📅 Каждый год", "freq_365d")],
     [("⏰ Каждый час", "freq_1h"), ("⏰ Каждые 30 минут", "freq_30min")],
+    [("🕘 Каждые 30 минут с 09:00 до 18:00", "window_09:00-18:00/30")],
+    [("🕘 Каждый час с 09:00 до 21:00", "window_09:00-21:00/60"), ("✏️ Свой интервал", "window_custom")],
     [("✏️ Свой вариант", "freq_custom"), ("Отмена", "cancel")]
 ]
 inline_markup_frequency_presets = create_inline_keyboard(frequency_preset_buttons)
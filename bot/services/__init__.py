@@ -1,5 +1,7 @@
 """Services module for the bot."""
 
 from .scheduler import send_reminders
+from .engine import ReminderEngine, reminder_engine
+from .outbox import OutboxSender, outbox_sender
 
-__all__ = ["send_reminders"]
+__all__ = ["send_reminders", "ReminderEngine", "reminder_engine", "OutboxSender", "outbox_sender"]
@@ -0,0 +1,295 @@
+"""Concurrent, rate-limited delivery of reminder messages."""
+
+import asyncio
+import heapq
+import logging
+import time
+from collections import deque
+from typing import NamedTuple
+
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+from aiogram.types import InlineKeyboardMarkup
+
+from bot.config import DELIVERY_WORKERS, TELEGRAM_GLOBAL_RATE, TELEGRAM_CHAT_RATE
+
+logger = logging.getLogger(__name__)
+
+MAX_SEND_ATTEMPTS = 3
+
+# Bad request descriptions that mean the chat can never be reached again
+UNREACHABLE_CHAT_ERRORS = ("chat not found", "user is deactivated")
+
+# Delivery priorities, lower is sent first: new slots, snoozed repeats, follow-ups
+PRIORITY_FIRE = 0
+PRIORITY_SNOOZE = 1
+PRIORITY_NAG = 2
+
+
+class Delivery(NamedTuple):
+    """
+    Reminder message waiting to be sent, covering one reminder or a digest of several.
+
+    With edit_message_id set, that message is updated in place instead of
+    sending a new one. due_at is when the earliest reminder of the message
+    came due; priority decides what is sent first under load.
+    """
+    chat_id: int
+    text: str
+    reply_markup: InlineKeyboardMarkup
+    reminder_ids: tuple[int, ...]
+    replace_message_ids: tuple[int, ...] = ()
+    edit_message_id: int | None = None
+    priority: int = PRIORITY_FIRE
+    due_at: int | None = None
+
+
+class DeliveryResults(NamedTuple):
+    """Outcome of a delivery round."""
+    message_ids: list[int | None]
+    unreachable_chats: set[int]
+
+
+class ChatUnreachable(Exception):
+    """The chat rejected a message permanently."""
+
+
+class _RetryDelivery(Exception):
+    """The attempt failed but may succeed later, possibly as a changed delivery."""
+
+    def __init__(self, delivery: Delivery):
+        super().__init__()
+        self.delivery = delivery
+
+
+def _is_unreachable(error: Exception) -> bool:
+    """Check whether a Telegram error means the chat will never accept messages again."""
+    if isinstance(error, TelegramForbiddenError):
+        return True
+    if isinstance(error, TelegramBadRequest):
+        return any(description in error.message.lower() for description in UNREACHABLE_CHAT_ERRORS)
+    return False
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter with adaptive backoff.
+
+    On flood control the bucket halves its rate (and optionally pauses),
+    then recovers a little with every successful acquire.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._current_rate = rate
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._resume_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available and take it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._resume_at:
+                    await asyncio.sleep(self._resume_at - now)
+                    continue
+
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self._current_rate = min(self.rate, self._current_rate + self.rate / 100)
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._current_rate)
+
+    def try_acquire(self) -> float:
+        """
+        Take a token if one is available, without waiting.
+
+        Returns:
+            0 if a token was taken, otherwise seconds until one is available
+        """
+        now = time.monotonic()
+        if now < self._resume_at:
+            return self._resume_at - now
+
+        self._refill(now)
+        if self._tokens >= 1:
+            self._tokens -= 1
+            self._current_rate = min(self.rate, self._current_rate + self.rate / 100)
+            return 0.0
+        return (1 - self._tokens) / self._current_rate
+
+    def backoff(self, pause: float = 0.0):
+        """
+        Slow the bucket down after a flood-control error.
+
+        Args:
+            pause: Seconds during which no tokens are handed out
+        """
+        now = time.monotonic()
+        self._refill(now)
+        self._current_rate = max(self.rate / 8, self._current_rate / 2)
+        if pause > 0:
+            self._resume_at = max(self._resume_at, now + pause)
+            self._updated_at = self._resume_at
+            self._tokens = 0
+
+    def is_idle(self) -> bool:
+        """Check whether the bucket is full and running at its nominal rate."""
+        now = time.monotonic()
+        if now < self._resume_at:
+            return False
+        self._refill(now)
+        return self._tokens >= self.capacity and self._current_rate >= self.rate
+
+    def _refill(self, now: float):
+        """Add tokens accumulated since the last update."""
+        if now > self._updated_at:
+            elapsed = now - self._updated_at
+            self._tokens = min(self.capacity, self._tokens + elapsed * self._current_rate)
+            self._updated_at = now
+
+
+_global_bucket = TokenBucket(TELEGRAM_GLOBAL_RATE)
+_chat_buckets: dict[int, TokenBucket] = {}
+
+
+async def deliver_all(bot, deliveries: list[Delivery]) -> DeliveryResults:
+    """
+    Send reminder messages concurrently within Telegram rate limits.
+
+    Workers only wait for the global rate limit. A chat without a token
+    of its own rate limit is put aside until it has one, so a chat with
+    many messages does not hold up the others. Once a chat turns out to be
+    unreachable (bot blocked, chat deleted, account deactivated), its
+    remaining messages are skipped.
+
+    Args:
+        bot: Bot instance for sending messages
+        deliveries: Messages to send
+
+    Returns:
+        DeliveryResults with sent message IDs in the order of deliveries
+        (None for failed ones) and the chats that can no longer be reached
+    """
+    results: list[int | None] = [None] * len(deliveries)
+    unreachable_chats: set[int] = set()
+    # Messages of a chat go out one at a time in their order; a chat is either
+    # ready, put aside until (ready_at, chat_id) or in the hands of a worker
+    chat_queues: dict[int, deque[tuple[int, Delivery, int]]] = {}
+    for index, delivery in enumerate(deliveries):
+        chat_queues.setdefault(delivery.chat_id, deque()).append((index, delivery, 1))
+    ready = deque(chat_queues)
+    waiting: list[tuple[float, int]] = []
+
+    async def worker():
+        while ready or waiting:
+            if not ready:
+                await asyncio.sleep(max(0.0, waiting[0][0] - time.monotonic()))
+                now = time.monotonic()
+                while waiting and waiting[0][0] <= now:
+                    ready.append(heapq.heappop(waiting)[1])
+                continue
+
+            chat_id = ready.popleft()
+            chat_bucket = _chat_buckets.get(chat_id)
+            if chat_bucket is None:
+                chat_bucket = _chat_buckets[chat_id] = TokenBucket(TELEGRAM_CHAT_RATE)
+            wait = chat_bucket.try_acquire()
+            if wait > 0:
+                heapq.heappush(waiting, (time.monotonic() + wait, chat_id))
+                continue
+
+            queue = chat_queues[chat_id]
+            index, delivery, attempt = queue.popleft()
+            try:
+                results[index] = await _deliver(bot, delivery, chat_bucket)
+            except ChatUnreachable as e:
+                logger.info(f"Chat {chat_id} is unreachable: {e}")
+                unreachable_chats.add(chat_id)
+                queue.clear()
+            except _RetryDelivery as e:
+                if attempt >= MAX_SEND_ATTEMPTS:
+                    logger.error(f"Giving up on reminders {delivery.reminder_ids} after {attempt} attempts")
+                else:
+                    queue.appendleft((index, e.delivery, attempt + 1))
+            if queue:
+                ready.append(chat_id)
+
+    workers = min(DELIVERY_WORKERS, len(deliveries))
+    await asyncio.gather(*(worker() for _ in range(workers)))
+
+    # Forget chats that have no pending rate-limit state
+    for chat_id in [chat_id for chat_id, bucket in _chat_buckets.items() if bucket.is_idle()]:
+        del _chat_buckets[chat_id]
+
+    return DeliveryResults(results, unreachable_chats)
+
+
+async def _deliver(bot, delivery: Delivery, chat_bucket: TokenBucket) -> int | None:
+    """
+    Replace the previous reminder messages with a new one, or update one in place.
+
+    The caller has already taken a token of the chat's bucket.
+
+    Args:
+        bot: Bot instance for sending messages
+        delivery: Message to send
+        chat_bucket: Rate limiter of the chat
+
+    Returns:
+        Sent or edited message ID, or None if sending failed
+
+    Raises:
+        ChatUnreachable: If the chat rejected the message permanently
+        _RetryDelivery: If the message should be attempted again; a message
+            that can no longer be edited is retried as a new one
+    """
+    # Delete previous reminder messages
+    for message_id in delivery.replace_message_ids:
+        await _global_bucket.acquire()
+        try:
+            await bot.delete_message(chat_id=delivery.chat_id, message_id=message_id)
+        except Exception:
+            pass
+    # A retry must not delete them again
+    delivery = delivery._replace(replace_message_ids=())
+
+    edit_message_id = delivery.edit_message_id
+    await _global_bucket.acquire()
+    try:
+        if edit_message_id:
+            await bot.edit_message_text(
+                text=delivery.text,
+                chat_id=delivery.chat_id,
+                message_id=edit_message_id,
+                reply_markup=delivery.reply_markup,
+                parse_mode="Markdown"
+            )
+            return edit_message_id
+
+        message = await bot.send_message(
+            delivery.chat_id,
+            delivery.text,
+            reply_markup=delivery.reply_markup,
+            parse_mode="Markdown"
+        )
+        return message.message_id
+    except TelegramRetryAfter as e:
+        logger.warning(f"Flood control for chat {delivery.chat_id}, retry in {e.retry_after}s")
+        chat_bucket.backoff(e.retry_after)
+        _global_bucket.backoff()
+        raise _RetryDelivery(delivery) from e
+    except (TelegramForbiddenError, TelegramBadRequest) as e:
+        if _is_unreachable(e):
+            raise ChatUnreachable(e.message) from e
+        if not edit_message_id:
+            logger.exception(f"Failed to send reminders {delivery.reminder_ids} to chat {delivery.chat_id}")
+            return None
+        logger.info(f"Cannot edit message {edit_message_id} in chat {delivery.chat_id} ({e.message}), sending anew")
+        raise _RetryDelivery(delivery._replace(edit_message_id=None)) from e
+    except Exception:
+        logger.exception(f"Failed to send reminders {delivery.reminder_ids} to chat {delivery.chat_id}")
+        return None
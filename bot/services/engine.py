@@ -0,0 +1,133 @@
+"""Event-driven timer engine that fires reminders at their exact deadlines."""
+
+import asyncio
+import heapq
+import logging
+import time
+
+from bot.database import get_reader
+from bot.services.outbox import outbox_sender
+from bot.services.scheduler import send_reminders
+from bot.utils import earliest_timestamp
+
+logger = logging.getLogger(__name__)
+
+# Delay before retrying reminders whose scheduler pass failed
+RETRY_DELAY_SECONDS = 60
+
+
+class ReminderEngine:
+    """
+    Min-heap of upcoming reminder fire times and follow-ups.
+
+    The engine sleeps until the earliest deadline and only then runs a
+    scheduler pass. Handlers push changes through schedule() and cancel(),
+    so the database is not touched while nothing is due.
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[int, int]] = []
+        self._deadlines: dict[int, int] = {}
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        """Load upcoming fire times from the database and start the timer loop."""
+        async with get_reader() as db:
+            async with db.execute(
+                'SELECT id, next_fire_at, nag_at FROM reminders '
+                'WHERE active = 1 AND (next_fire_at IS NOT NULL OR nag_at IS NOT NULL)'
+            ) as cursor:
+                rows = [
+                    (reminder_id, earliest_timestamp(next_fire_at, nag_at))
+                    for reminder_id, next_fire_at, nag_at in await cursor.fetchall()
+                ]
+
+        self._deadlines = {reminder_id: fire_at for reminder_id, fire_at in rows}
+        self._heap = [(fire_at, reminder_id) for reminder_id, fire_at in rows]
+        heapq.heapify(self._heap)
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Reminder engine started ({len(self._heap)} reminders scheduled)")
+
+    async def stop(self):
+        """Stop the timer loop."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def schedule(self, reminder_id: int, fire_at: int | None):
+        """
+        Set or replace the next fire time of a reminder.
+
+        Args:
+            reminder_id: Reminder ID
+            fire_at: UTC epoch seconds of the next slot or follow-up, or None to unschedule
+        """
+        if fire_at is None:
+            self.cancel(reminder_id)
+            return
+
+        self._deadlines[reminder_id] = fire_at
+        heapq.heappush(self._heap, (fire_at, reminder_id))
+        if self._heap[0] == (fire_at, reminder_id):
+            self._wakeup.set()
+
+    def cancel(self, reminder_id: int):
+        """
+        Remove a reminder from the timer.
+
+        Args:
+            reminder_id: Reminder ID
+        """
+        # Heap entries are dropped lazily once they reach the top
+        self._deadlines.pop(reminder_id, None)
+
+    def _discard_stale(self):
+        """Pop heap entries that were cancelled or rescheduled."""
+        while self._heap:
+            fire_at, reminder_id = self._heap[0]
+            if self._deadlines.get(reminder_id) == fire_at:
+                return
+            heapq.heappop(self._heap)
+
+    async def _run(self):
+        """Sleep until the next deadline and run a scheduler pass when it passes."""
+        while True:
+            self._discard_stale()
+            delay = self._heap[0][0] - time.time() if self._heap else None
+
+            if delay is None or delay > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            now = time.time()
+            due_ids = []
+            while self._heap and self._heap[0][0] <= now:
+                fire_at, reminder_id = heapq.heappop(self._heap)
+                if self._deadlines.get(reminder_id) == fire_at:
+                    del self._deadlines[reminder_id]
+                    due_ids.append(reminder_id)
+
+            try:
+                updates = await send_reminders()
+            except Exception:
+                logger.exception("Scheduler pass failed")
+                for reminder_id in due_ids:
+                    self.schedule(reminder_id, int(now) + RETRY_DELAY_SECONDS)
+                continue
+
+            outbox_sender.notify()
+            for reminder_id, fire_at in updates:
+                self.schedule(reminder_id, fire_at)
+
+
+reminder_engine = ReminderEngine()
@@ -0,0 +1,209 @@
+"""Durable queue of reminder messages between the scheduler and Telegram."""
+
+import asyncio
+import logging
+import time
+
+import aiosqlite
+from aiogram.types import InlineKeyboardMarkup
+
+from bot.config import (
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_RETRY_SECONDS,
+    OUTBOX_SHED_LAG_SECONDS
+)
+from bot.database import forget_user_profiles, get_reader, run_write
+from bot.services.delivery import Delivery, PRIORITY_NAG, deliver_all
+
+logger = logging.getLogger(__name__)
+
+
+def _join_ids(ids: tuple[int, ...]) -> str:
+    """Store a tuple of IDs as comma-separated text."""
+    return ",".join(str(i) for i in ids)
+
+
+def _split_ids(text: str) -> tuple[int, ...]:
+    """Read a tuple of IDs stored as comma-separated text."""
+    return tuple(int(i) for i in text.split(",") if i)
+
+
+async def enqueue_deliveries(db: aiosqlite.Connection, deliveries: list[Delivery]):
+    """
+    Queue messages for sending within the current transaction.
+
+    Args:
+        db: Writer connection
+        deliveries: Messages to send
+    """
+    now_ts = int(time.time())
+    await db.executemany(
+        'INSERT INTO outbox (chat_id, text, reply_markup, reminder_ids, replace_message_ids, '
+        'edit_message_id, priority, due_at, next_attempt_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        [
+            (
+                delivery.chat_id,
+                delivery.text,
+                delivery.reply_markup.model_dump_json(exclude_none=True),
+                _join_ids(delivery.reminder_ids),
+                _join_ids(delivery.replace_message_ids),
+                delivery.edit_message_id,
+                delivery.priority,
+                delivery.due_at,
+                now_ts
+            )
+            for delivery in deliveries
+        ]
+    )
+
+
+class OutboxSender:
+    """
+    Loop that sends queued messages and records the results.
+
+    Sending happens outside of any transaction; sent message IDs and
+    failures are written back in one batch per round. Messages are sent
+    at least once: a crash between sending and the write-back sends them
+    again after restart.
+
+    Due messages are taken by priority, so new slots go out before
+    snoozed repeats and those before follow-ups. When a batch has waited
+    in the queue for more than OUTBOX_SHED_LAG_SECONDS, its follow-ups are
+    dropped: the next follow-up is already scheduled, and sending a stale
+    one would only delay the rest.
+    """
+
+    def __init__(self):
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._bot = None
+
+    async def start(self, bot):
+        """
+        Start the sender loop.
+
+        Args:
+            bot: Bot instance for sending messages
+        """
+        self._bot = bot
+        self._task = asyncio.create_task(self._run())
+        logger.info("Outbox sender started")
+
+    async def stop(self):
+        """Stop the sender loop; unsent messages stay queued."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def notify(self):
+        """Wake the loop up after new messages were queued."""
+        self._wakeup.set()
+
+    async def _run(self):
+        """Send due messages, then sleep until notified or a retry is due."""
+        while True:
+            self._wakeup.clear()
+            try:
+                delay = await self._drain()
+            except Exception:
+                logger.exception("Outbox round failed")
+                delay = OUTBOX_RETRY_SECONDS
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _drain(self) -> float | None:
+        """
+        Send due messages in batches until none are left.
+
+        Returns:
+            Seconds until the next retry is due, or None if the outbox is empty
+        """
+        while True:
+            now_ts = int(time.time())
+            async with get_reader() as db:
+                async with db.execute(
+                    'SELECT id, chat_id, text, reply_markup, reminder_ids, replace_message_ids, '
+                    'edit_message_id, priority, due_at, next_attempt_at, attempts FROM outbox '
+                    'WHERE next_attempt_at <= ? '
+                    'ORDER BY priority, id LIMIT ?',
+                    (now_ts, OUTBOX_BATCH_SIZE)
+                ) as cursor:
+                    rows = await cursor.fetchall()
+
+                if not rows:
+                    async with db.execute('SELECT MIN(next_attempt_at) FROM outbox') as cursor:
+                        next_attempt_at = (await cursor.fetchone())[0]
+                    return None if next_attempt_at is None else max(0, next_attempt_at - now_ts)
+
+            # Lag is how long the batch waited in the queue since it could be sent;
+            # late slots and retries count from when they were queued or rescheduled
+            lag = now_ts - min(row[-2] for row in rows)
+            shed = []
+            if lag > OUTBOX_SHED_LAG_SECONDS:
+                shed = [(row[0],) for row in rows if row[-4] >= PRIORITY_NAG]
+                if shed:
+                    logger.warning(f"Outbox is {lag}s behind, dropping {len(shed)} follow-ups")
+                    rows = [row for row in rows if row[-4] < PRIORITY_NAG]
+
+            deliveries = [
+                Delivery(
+                    chat_id=chat_id,
+                    text=text,
+                    reply_markup=InlineKeyboardMarkup.model_validate_json(reply_markup),
+                    reminder_ids=_split_ids(reminder_ids),
+                    replace_message_ids=_split_ids(replace_message_ids),
+                    edit_message_id=edit_message_id,
+                    priority=priority,
+                    due_at=due_at
+                )
+                for (
+                    _, chat_id, text, reply_markup, reminder_ids, replace_message_ids,
+                    edit_message_id, priority, due_at, _, _
+                ) in rows
+            ]
+            message_ids, unreachable_chats = await deliver_all(self._bot, deliveries)
+
+            # Sent message IDs are saved, failed messages retried with exponential backoff
+            finished, retries, message_updates = shed, [], []
+            for row, delivery, message_id in zip(rows, deliveries, message_ids):
+                outbox_id, attempts = row[0], row[-1] + 1
+                if delivery.chat_id in unreachable_chats:
+                    continue
+                if message_id is not None:
+                    finished.append((outbox_id,))
+                    message_updates.extend((message_id, reminder_id) for reminder_id in delivery.reminder_ids)
+                elif attempts >= OUTBOX_MAX_ATTEMPTS:
+                    logger.error(f"Dropping reminders {delivery.reminder_ids} after {attempts} outbox attempts")
+                    finished.append((outbox_id,))
+                else:
+                    retries.append((attempts, now_ts + OUTBOX_RETRY_SECONDS * 2 ** (attempts - 1), outbox_id))
+
+            # Users who blocked the bot or deleted their account are taken out of
+            # the schedule together with their reminders and queued messages
+            blocked = [(chat_id,) for chat_id in unreachable_chats]
+
+            async def record(db: aiosqlite.Connection):
+                await db.executemany('UPDATE reminders SET last_message_id = ? WHERE id = ?', message_updates)
+                await db.executemany('DELETE FROM outbox WHERE id = ?', finished)
+                await db.executemany(
+                    'UPDATE outbox SET attempts = ?, next_attempt_at = ? WHERE id = ?',
+                    retries
+                )
+                await db.executemany("UPDATE users SET status = 'blocked' WHERE user_id = ?", blocked)
+                await db.executemany('UPDATE reminders SET active = 0 WHERE user_id = ?', blocked)
+                await db.executemany('DELETE FROM outbox WHERE chat_id = ?', blocked)
+
+            await run_write(record)
+            forget_user_profiles(unreachable_chats)
+
+
+outbox_sender = OutboxSender()
@@ -1,169 +1,479 @@
 """Scheduler service for sending reminders."""
 
 import datetime
+import logging
+from typing import NamedTuple
+
 import aiosqlite
 import pytz
 
 from bot.config import (
-    DB_PATH,
-    DATETIME_FORMAT,
-    TIME_FORMAT,
-    FULL_DATE_FORMAT,
-    FREQUENCY_ZERO,
+    CATCH_UP_WINDOW_MINUTES,
     REMINDER_OFFSET_MINUTES,
     TEMP_REMINDER_EXPIRATION_HOURS
 )
-from bot.database import get_user_timezone
+from bot.database import run_write
 from bot.keyboards import create_inline_keyboard
-from bot.utils import calculate_next_datetime, shift_dates, shift_times
+from bot.services.delivery import Delivery, PRIORITY_FIRE, PRIORITY_NAG, PRIORITY_SNOOZE
+from bot.services.outbox import enqueue_deliveries
+from bot.utils import earliest_timestamp, get_recurrence, shorten
+
+logger = logging.getLogger(__name__)
+
+
+class _NagState(NamedTuple):
+    """
+    Follow-up state of a reminder.
+
+    nag_at is the next repeat of the reminder message. Once it reaches
+    nag_deadline no more repeats are sent, and the deadline itself only
+    ends the follow-up state.
+    """
+    nag_at: int | None
+    nag_deadline: int | None
+    nag_count: int
+
+
+_NO_NAG = _NagState(None, None, 0)
 
+# Telegram allows up to 100 buttons per message, a digest item takes a row of four
+DIGEST_MAX_ITEMS = 20
+# Names in a digest are cut to this length, so a full digest fits Telegram's 4096 characters
+DIGEST_TEXT_LENGTH = 150
+
+
+class _DueReminder(NamedTuple):
+    """
+    Reminder whose message is to be sent in the current pass.
 
-async def send_reminders(bot):
+    message_share is the number of the user's reminders pointing at
+    last_message_id, more than one for a digest message. due_at is the
+    slot or follow-up time the message is sent for.
     """
-    Check and send due reminders.
+    reminder_id: int
+    chat_id: int
+    name_reminder: str
+    last_message_id: int | None
+    message_share: int
+    nag: _NagState
+    priority: int
+    due_at: int
+
+    @property
+    def is_follow_up(self) -> bool:
+        """Whether this is a repeat of an already sent message."""
+        return self.nag.nag_count > 0
+
+
+def _follow_up(sent_at: int, nag_deadline: int, nag_count: int) -> _NagState:
+    """
+    Follow-up state after a reminder message was sent.
 
     Args:
-        bot: Bot instance for sending messages
+        sent_at: Time the message was due as UTC epoch seconds
+        nag_deadline: End of the follow-ups as UTC epoch seconds
+        nag_count: Number of follow-ups sent so far
+
+    Returns:
+        _NagState with the next follow-up or, past the deadline, the deadline itself
     """
-    current_datetime_utc = datetime.datetime.now(pytz.UTC)
+    nag_at = sent_at + REMINDER_OFFSET_MINUTES * 60
+    return _NagState(min(nag_at, nag_deadline), nag_deadline, nag_count)
 
-    async with aiosqlite.connect(DB_PATH) as db:
-        # Delete expired temporary reminders
-        await db.execute(
-            'DELETE FROM reminders WHERE expiration_time IS NOT NULL AND expiration_time < ?',
-            (current_datetime_utc.strftime(DATETIME_FORMAT),)
+
+class _TickWrites:
+    """
+    Database mutations of one scheduler pass.
+
+    Mutations are collected while reminders are evaluated and flushed with
+    executemany, so a pass costs one writer operation instead of one per statement.
+    """
+
+    def __init__(self):
+        self.updates: list[tuple] = []
+        self.advances: list[tuple[int]] = []
+        self.occurrences: list[tuple[int, int]] = []
+        self.deletes: list[tuple[int]] = []
+        self.missed: list[tuple[str, int]] = []
+        self.schedule_updates: list[tuple[int, int | None]] = []
+        self.late = 0  # Slots and follow-ups sent after their minute
+
+    def update(
+        self,
+        reminder_id: int,
+        next_fire_at: int | None,
+        nag: _NagState,
+        fired_at: int | None
+    ):
+        """Queue the new slot and follow-up state of a reminder."""
+        self.updates.append((
+            next_fire_at, nag.nag_at, nag.nag_deadline, nag.nag_count, fired_at, reminder_id
+        ))
+        self.schedule_updates.append((reminder_id, earliest_timestamp(next_fire_at, nag.nag_at)))
+
+    def advance(self, reminder_id: int, occurrences: list[int]):
+        """Queue moving a recurring reminder to its next period."""
+        self.advances.append((reminder_id,))
+        self.occurrences.extend((reminder_id, fire_at) for fire_at in occurrences)
+
+    def delete(self, reminder_id: int):
+        """Queue a reminder deletion."""
+        self.deletes.append((reminder_id,))
+        self.schedule_updates.append((reminder_id, None))
+
+    def miss(self, reminder_id: int, missed_at: int):
+        """Queue deleting a reminder whose last slot was skipped, keeping it in history as missed."""
+        self.missed.append((datetime.datetime.fromtimestamp(missed_at, pytz.UTC).isoformat(), reminder_id))
+        self.delete(reminder_id)
+
+    async def flush(self, db: aiosqlite.Connection):
+        """Write all queued mutations within the current transaction."""
+        # Advanced reminders get a fresh set of occurrences below
+        await db.executemany('DELETE FROM reminder_occurrences WHERE reminder_id = ?', self.advances)
+        await db.executemany(
+            'UPDATE reminders SET recurrence_count = recurrence_count + 1 WHERE id = ?',
+            self.advances
+        )
+        await db.executemany(
+            'INSERT INTO reminder_occurrences (reminder_id, fire_at_utc) VALUES (?, ?)',
+            self.occurrences
         )
-        await db.commit()
+        await db.executemany(
+            'UPDATE reminders SET next_fire_at = ?, nag_at = ?, nag_deadline = ?, nag_count = ?, '
+            'nag_snoozed = 0, last_fired_at = COALESCE(?, last_fired_at) WHERE id = ?',
+            self.updates
+        )
+        await db.executemany(
+            'INSERT INTO reminder_history '
+            '(reminder_id, user_id, name_reminder, frequency, dates, times, completed_at, action) '
+            "SELECT id, user_id, name_reminder, frequency, dates, times, ?, 'missed' FROM reminders WHERE id = ?",
+            self.missed
+        )
+        await db.executemany('DELETE FROM reminders WHERE id = ?', self.deletes)
+
+
+async def send_reminders() -> list[tuple[int, int | None]]:
+    """
+    Check due reminders and follow-ups and queue their messages.
+
+    Moving reminders to their next slot and queueing the messages in the
+    outbox happen in one transaction; the outbox sender does the network I/O.
 
-        # Get all active reminders
+    The end of the last pass is persisted as a high-water mark. Slots and
+    follow-ups that came due since then are sent late, e.g. after a restart
+    or a slow pass, unless they are older than CATCH_UP_WINDOW_MINUTES.
+
+    Returns:
+        List of (reminder_id, wake_at) changes for the timer engine
+    """
+    due_reminders = []
+    digest_chats = set()
+    edit_chats = set()
+    now_ts = int(datetime.datetime.now(pytz.UTC).timestamp())
+    minute_start = now_ts - now_ts % 60
+
+    async def plan(db: aiosqlite.Connection) -> _TickWrites:
         async with db.execute(
-            'SELECT id, user_id, name_reminder, frequency, dates, times, '
-            'expiration_time, last_message_id FROM reminders WHERE active = 1',
-            ()
+            "SELECT value FROM scheduler_state WHERE key = 'processed_until'"
+        ) as cursor:
+            row = await cursor.fetchone()
+
+        # Replay everything since the last pass, but never less than the current minute
+        catch_up_from = minute_start if row is None else min(row[0] + 1, minute_start)
+        catch_up_from = max(catch_up_from, now_ts - CATCH_UP_WINDOW_MINUTES * 60)
+
+        # Get only reminders with a due slot or follow-up, together with the owner's
+        # timezone and the slot that follows, looked up in the occurrence index
+        async with db.execute(
+            'SELECT r.id, r.user_id, r.name_reminder, r.frequency, r.dates, r.times, '
+            'r.last_message_id, '
+            '(SELECT COUNT(*) FROM reminders s '
+            'WHERE s.user_id = r.user_id AND s.last_message_id = r.last_message_id), '
+            'r.next_fire_at, r.nag_at, r.nag_deadline, r.nag_count, r.nag_snoozed, u.timezone, '
+            '(SELECT MIN(o.fire_at_utc) FROM reminder_occurrences o '
+            'WHERE o.reminder_id = r.id AND o.fire_at_utc > MAX(r.next_fire_at, ?)), '
+            'u.digest_mode, u.nag_ping '
+            'FROM reminders r JOIN users u ON u.user_id = r.user_id '
+            "WHERE r.active = 1 AND u.status = 'active' AND (r.next_fire_at <= ? OR r.nag_at <= ?)",
+            (minute_start - 1, now_ts, now_ts)
         ) as cursor:
             reminders = await cursor.fetchall()
 
-        for reminder in reminders:
-            (
-                reminder_id, user_id, name_reminder, frequency,
-                dates, times, expiration_time, last_message_id
-            ) = reminder
+        writes = _TickWrites()
+        for *reminder, digest_mode, nag_ping in reminders:
+            due = _process_reminder(writes, reminder, now_ts, minute_start, catch_up_from)
+            if due:
+                due_reminders.append(due)
+                if digest_mode:
+                    digest_chats.add(due.chat_id)
+                if not nag_ping:
+                    edit_chats.add(due.chat_id)
 
-            timezone = await get_user_timezone(user_id)
-            if not timezone:
-                continue
+        if writes.late:
+            logger.info(f"Catching up {writes.late} reminders missed since {catch_up_from}")
+        if writes.missed:
+            logger.warning(
+                f"Dropped {len(writes.missed)} reminders whose last slot was before {catch_up_from}"
+            )
 
-            user_tz = pytz.timezone(timezone)
-            current_time_user = current_datetime_utc.astimezone(user_tz).strftime(TIME_FORMAT)
-            current_date_user = current_datetime_utc.astimezone(user_tz).strftime(FULL_DATE_FORMAT)
+        await writes.flush(db)
+        await enqueue_deliveries(db, _build_deliveries(due_reminders, digest_chats, edit_chats))
+        await db.execute(
+            "INSERT INTO scheduler_state (key, value) VALUES ('processed_until', ?) "
+            'ON CONFLICT (key) DO UPDATE SET value = MAX(value, excluded.value)',
+            (now_ts,)
+        )
+        return writes
 
-            date_list = dates.split(",")
-            if current_date_user not in date_list:
-                continue
+    writes = await run_write(plan)
+    return writes.schedule_updates
 
-            time_list = times.split(",")
-            if current_time_user not in time_list:
-                continue
 
-            current_dt = datetime.datetime.strptime(
-                f"{current_date_user} {current_time_user}",
-                f'{FULL_DATE_FORMAT} {TIME_FORMAT}'
-            )
-            current_dt = user_tz.localize(current_dt).astimezone(pytz.UTC)
-
-            is_temporary = expiration_time is not None
-            if is_temporary:
-                expiration_dt = datetime.datetime.strptime(
-                    expiration_time,
-                    DATETIME_FORMAT
-                ).replace(tzinfo=pytz.UTC)
-                expiration_time_new = expiration_time
-            else:
-                expiration_dt = current_dt + datetime.timedelta(
-                    hours=TEMP_REMINDER_EXPIRATION_HOURS
-                )
-                expiration_time_new = expiration_dt.strftime(DATETIME_FORMAT)
-
-            # Delete previous reminder message
-            if last_message_id:
-                try:
-                    await bot.delete_message(chat_id=user_id, message_id=last_message_id)
-                except Exception:
-                    pass
-
-            # Create next temporary reminder if needed
-            new_reminder_id = None
-            next_dt = current_dt + datetime.timedelta(minutes=REMINDER_OFFSET_MINUTES)
-
-            if next_dt < expiration_dt:
-                new_date = next_dt.astimezone(user_tz).strftime(FULL_DATE_FORMAT)
-                new_times = next_dt.astimezone(user_tz).strftime(TIME_FORMAT)
-                await db.execute(
-                    'INSERT INTO reminders (user_id, name_reminder, frequency, dates, '
-                    'times, active, expiration_time) VALUES (?, ?, ?, ?, ?, ?, ?)',
-                    (user_id, name_reminder, FREQUENCY_ZERO, new_date,
-                     new_times, 1, expiration_time_new)
-                )
-                await db.commit()
-                new_reminder_id = (await (await db.execute(
-                    'SELECT last_insert_rowid()'
-                )).fetchone())[0]
-
-                # Create inline keyboard with snooze and done buttons
-                inline_markup_new = create_inline_keyboard([
-                    [("⏰ +5мин", f"snooze_5_{new_reminder_id}"), ("⏰ +15мин", f"snooze_15_{new_reminder_id}")],
-                    [("⏰ +1час", f"snooze_60_{new_reminder_id}"), ("📅 Завтра", f"snooze_tomorrow_{new_reminder_id}")],
-                    [("✅ Готово", f"delete_{new_reminder_id}")]
-                ])
-            else:
-                # For last temporary reminder use current reminder_id
-                inline_markup_new = create_inline_keyboard([
-                    [("⏰ +5мин", f"snooze_5_{reminder_id}"), ("⏰ +15мин", f"snooze_15_{reminder_id}")],
-                    [("⏰ +1час", f"snooze_60_{reminder_id}"), ("📅 Завтра", f"snooze_tomorrow_{reminder_id}")],
-                    [("✅ Готово", f"last_{reminder_id}")]
-                ])
-
-            # Send reminder message
-            message = await bot.send_message(
-                user_id,
-                f"🔔 Напоминание: *{name_reminder}*",
-                reply_markup=inline_markup_new,
-                parse_mode="Markdown"
+def _process_reminder(
+    writes: _TickWrites,
+    reminder: tuple,
+    now_ts: int,
+    minute_start: int,
+    catch_up_from: int
+) -> _DueReminder | None:
+    """
+    Prepare a due reminder or follow-up for sending and move it to its next slot.
+
+    Args:
+        writes: Mutations of the current scheduler pass
+        reminder: Row of the due reminder
+        now_ts: Current time as UTC epoch seconds
+        minute_start: Start of the current minute as UTC epoch seconds
+        catch_up_from: Earliest due time still sent, as UTC epoch seconds
+
+    Returns:
+        Reminder to send, or None if nothing is to be sent
+    """
+    (
+        reminder_id, user_id, name_reminder, frequency, dates, times, last_message_id, message_share,
+        next_fire_at, nag_at, nag_deadline, nag_count, nag_snoozed, timezone, following_fire_at
+    ) = reminder
+    due = None
+    fired_at = None
+    missed = False
+
+    if next_fire_at is not None and next_fire_at <= now_ts:
+        # A new slot replaces follow-ups still pending from the previous one;
+        # slots missed for longer than the catch-up window are skipped
+        nag = _NO_NAG
+        if next_fire_at >= catch_up_from:
+            deadline = next_fire_at + TEMP_REMINDER_EXPIRATION_HOURS * 3600
+            # Follow-ups of a late message count from when it is actually sent
+            nag = _follow_up(max(next_fire_at, minute_start), deadline, 0)
+            due = _DueReminder(
+                reminder_id, user_id, name_reminder, last_message_id, message_share, nag,
+                PRIORITY_FIRE, next_fire_at
             )
+            fired_at = next_fire_at
+            if next_fire_at < minute_start:
+                writes.late += 1
+        else:
+            missed = True
+
+        after = max(next_fire_at + 1, minute_start)
+        next_fire_at = following_fire_at
+
+        # Store the next occurrences of a recurring reminder or time window
+        # if this was the last stored one
+        if next_fire_at is None:
+            recurrence = get_recurrence(frequency, dates, times, timezone)
+            if recurrence.repeats:
+                new_occurrences = recurrence.after(after, recurrence.slot_count)
+                writes.advance(reminder_id, new_occurrences)
+                next_fire_at = new_occurrences[0] if new_occurrences else None
+    elif catch_up_from <= nag_at < nag_deadline:
+        nag = _follow_up(max(nag_at, minute_start), nag_deadline, nag_count + 1)
+        # A repeat the user asked for with a snooze button outranks a plain follow-up
+        priority = PRIORITY_SNOOZE if nag_snoozed else PRIORITY_NAG
+        due = _DueReminder(
+            reminder_id, user_id, name_reminder, last_message_id, message_share, nag,
+            priority, nag_at
+        )
+        if nag_at < minute_start:
+            writes.late += 1
+    else:
+        # Deadline reached, or the follow-up was missed for longer than the catch-up window
+        nag = _NO_NAG
+
+    # A reminder is removed once it has neither slots nor follow-ups left;
+    # one that never got its last message sent is kept in history as missed
+    if next_fire_at is None and nag.nag_at is None and missed:
+        writes.miss(reminder_id, now_ts)
+    elif next_fire_at is None and nag.nag_at is None:
+        writes.delete(reminder_id)
+    else:
+        writes.update(reminder_id, next_fire_at, nag, fired_at)
+
+    return due
+
+
+def _build_deliveries(
+    due_reminders: list[_DueReminder],
+    digest_chats: set[int],
+    edit_chats: set[int]
+) -> list[Delivery]:
+    """
+    Turn due reminders into messages.
+
+    Follow-ups of a chat that turned off fresh pings update the message
+    they repeat, provided that message shows exactly these reminders.
+    Repeats the user asked for with a snooze button always come as a new
+    message, since the snoozed one no longer shows the reminder.
+    Other reminders of a chat in digest mode that are due together are
+    sent as one message; everything else gets a message per reminder.
+
+    Args:
+        due_reminders: Reminders to send in this pass
+        digest_chats: Chats of users who enabled digest mode
+        edit_chats: Chats of users who get follow-ups as edits of the previous message
+
+    Returns:
+        Messages to send
+    """
+    deliveries = []
+    fresh = []
+    repeats: dict[tuple[int, int], list[_DueReminder]] = {}
+    for due in due_reminders:
+        if (
+            due.chat_id in edit_chats and due.is_follow_up and due.last_message_id
+            and due.priority != PRIORITY_SNOOZE
+        ):
+            repeats.setdefault((due.chat_id, due.last_message_id), []).append(due)
+        else:
+            fresh.append(due)
+
+    for items in repeats.values():
+        if len(items) != items[0].message_share:
+            fresh.extend(items)
+        elif len(items) == 1:
+            deliveries.append(_build_delivery(items[0], edit=True))
+        else:
+            deliveries.append(_build_digest(items, edit=True))
+
+    digests: dict[int, list[_DueReminder]] = {}
+    for due in fresh:
+        if due.chat_id in digest_chats:
+            digests.setdefault(due.chat_id, []).append(due)
+        else:
+            deliveries.append(_build_delivery(due))
+
+    for items in digests.values():
+        if len(items) == 1:
+            deliveries.append(_build_delivery(items[0]))
+            continue
+        for start in range(0, len(items), DIGEST_MAX_ITEMS):
+            deliveries.append(_build_digest(items[start:start + DIGEST_MAX_ITEMS]))
+    return deliveries
+
+
+def _done_action(nag: _NagState) -> str:
+    """Callback prefix of the done button; the last message before the deadline gets its own."""
+    return "last" if nag.nag_at >= nag.nag_deadline else "delete"
+
+
+def _build_delivery(due: _DueReminder, edit: bool = False) -> Delivery:
+    """
+    Build the reminder message with snooze and done buttons.
+
+    Args:
+        due: Reminder to send
+        edit: Update the previous message instead of replacing it
+
+    Returns:
+        Message to send
+    """
+    reminder_id = due.reminder_id
+    inline_markup_new = create_inline_keyboard([
+        [("⏰ +5мин", f"snooze_5_{reminder_id}"), ("⏰ +15мин", f"snooze_15_{reminder_id}")],
+        [("⏰ +1час", f"snooze_60_{reminder_id}"), ("📅 Завтра", f"snooze_tomorrow_{reminder_id}")],
+        [("✅ Готово", f"{_done_action(due.nag)}_{reminder_id}")]
+    ])
+
+    text = f"🔔 Напоминание: *{due.name_reminder}*"
+    if edit:
+        return Delivery(
+            chat_id=due.chat_id,
+            text=text + _repeat_note(due.nag),
+            reply_markup=inline_markup_new,
+            reminder_ids=(reminder_id,),
+            edit_message_id=due.last_message_id,
+            priority=due.priority,
+            due_at=due.due_at
+        )
+
+    return Delivery(
+        chat_id=due.chat_id,
+        text=text,
+        reply_markup=inline_markup_new,
+        reminder_ids=(reminder_id,),
+        replace_message_ids=(due.last_message_id,) if due.last_message_id else (),
+        priority=due.priority,
+        due_at=due.due_at
+    )
+
+
+def _build_digest(items: list[_DueReminder], edit: bool = False) -> Delivery:
+    """
+    Build one message for several reminders of a chat with a button row per reminder.
+
+    Args:
+        items: Reminders of the same chat
+        edit: Update the previous message of the items instead of replacing it
+
+    Returns:
+        Message to send
+    """
+    lines = [
+        f"{number}. *{shorten(due.name_reminder, DIGEST_TEXT_LENGTH)}*"
+        for number, due in enumerate(items, start=1)
+    ]
+    inline_markup_new = create_inline_keyboard([
+        [
+            (f"✅ {number}", f"{_done_action(due.nag)}_{due.reminder_id}"),
+            ("⏰ 15м", f"snooze_15_{due.reminder_id}"),
+            ("⏰ 1ч", f"snooze_60_{due.reminder_id}"),
+            ("📅 Завтра", f"snooze_tomorrow_{due.reminder_id}")
+        ]
+        for number, due in enumerate(items, start=1)
+    ])
+
+    text = "🔔 Напоминания:\n\n" + "\n".join(lines)
+    reminder_ids = tuple(due.reminder_id for due in items)
+    # A digest goes out with its most urgent item
+    priority = min(due.priority for due in items)
+    due_at = min(due.due_at for due in items)
+    if edit:
+        return Delivery(
+            chat_id=items[0].chat_id,
+            text=text + _repeat_note(max(items, key=lambda due: due.nag.nag_count).nag),
+            reply_markup=inline_markup_new,
+            reminder_ids=reminder_ids,
+            edit_message_id=items[0].last_message_id,
+            priority=priority,
+            due_at=due_at
+        )
+
+    # Reminders of a previous digest share its message, which is deleted once
+    replace_message_ids = tuple(dict.fromkeys(
+        due.last_message_id for due in items if due.last_message_id
+    ))
+
+    return Delivery(
+        chat_id=items[0].chat_id,
+        text=text,
+        reply_markup=inline_markup_new,
+        reminder_ids=reminder_ids,
+        replace_message_ids=replace_message_ids,
+        priority=priority,
+        due_at=due_at
+    )
+
 
-            # Update last_message_id
-            if new_reminder_id:
-                await db.execute(
-                    'UPDATE reminders SET last_message_id = ? WHERE id = ?',
-                    (message.message_id, new_reminder_id)
-                )
-            else:
-                await db.execute(
-                    'UPDATE reminders SET last_message_id = ? WHERE id = ?',
-                    (message.message_id, reminder_id)
-                )
-            await db.commit()
-
-            # Create next recurring reminder if this is the last time slot
-            if current_time_user == time_list[-1] and current_date_user == date_list[-1]:
-                if not is_temporary and frequency != FREQUENCY_ZERO:
-                    last_date_dt = datetime.datetime.strptime(
-                        date_list[-1],
-                        FULL_DATE_FORMAT
-                    )
-                    last_date_dt = user_tz.localize(last_date_dt)
-                    next_dt_original = calculate_next_datetime(last_date_dt, frequency)
-                    new_dates_original = shift_dates(dates, frequency, user_tz)
-                    new_times_original = shift_times(times, frequency, user_tz)
-
-                    await db.execute(
-                        'INSERT INTO reminders (user_id, name_reminder, frequency, '
-                        'dates, times, active) VALUES (?, ?, ?, ?, ?, ?)',
-                        (user_id, name_reminder, frequency, new_dates_original,
-                         new_times_original, 1)
-                    )
-                    await db.commit()
-
-                # Delete current reminder
-                await db.execute('DELETE FROM reminders WHERE id = ?', (reminder_id,))
-                await db.commit()
+def _repeat_note(nag: _NagState) -> str:
+    """Line added to an updated message, so every edit changes its text."""
+    return f"\n\n🔁 Повтор {nag.nag_count}"
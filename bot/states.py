@@ -8,6 +8,7 @@ class ReminderStates(StatesGroup):
     waiting_for_template_choice = State()
     waiting_for_name = State()
     waiting_for_frequency = State()
+    waiting_for_time_window = State()
     waiting_for_date = State()
     waiting_for_date_calendar_only = State()
     waiting_for_time = State()
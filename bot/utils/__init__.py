@@ -2,18 +2,27 @@
 
 from .datetime_utils import (
     parse_frequency,
-    calculate_next_datetime,
-    shift_times,
-    shift_dates,
     resolve_date,
-    finalize_date
+    finalize_date,
+    current_minute_timestamp,
+    compute_next_fire_at,
+    earliest_timestamp,
+    occurrence_timestamps
 )
+from .recurrence import Recurrence, TimeWindow, get_recurrence, parse_time_window
+from .text import shorten
 
 __all__ = [
     "parse_frequency",
-    "calculate_next_datetime",
-    "shift_times",
-    "shift_dates",
     "resolve_date",
-    "finalize_date"
+    "finalize_date",
+    "current_minute_timestamp",
+    "compute_next_fire_at",
+    "earliest_timestamp",
+    "occurrence_timestamps",
+    "Recurrence",
+    "TimeWindow",
+    "get_recurrence",
+    "parse_time_window",
+    "shorten"
 ]
@@ -1,8 +1,8 @@
 """Date and time utility functions."""
 
 import datetime
+import functools
 import re
-from dateutil.relativedelta import relativedelta
 import pytz
 
 from bot.config import (
@@ -35,97 +35,6 @@ def parse_frequency(frequency: str) -> dict:
     return intervals
 
 
-def calculate_next_datetime(
-    current_datetime: datetime.datetime,
-    frequency: str
-) -> datetime.datetime:
-    """
-    Calculate next datetime based on frequency.
-
-    Args:
-        current_datetime: Current datetime
-        frequency: Frequency string
-
-    Returns:
-        Next datetime
-    """
-    if frequency == FREQUENCY_ZERO:
-        return current_datetime
-
-    intervals = parse_frequency(frequency)
-    dt = current_datetime + datetime.timedelta(
-        days=intervals['d'],
-        hours=intervals['h'],
-        minutes=intervals['min']
-    )
-    dt = dt + relativedelta(
-        years=intervals['y'],
-        months=intervals['m']
-    )
-    return dt
-
-
-def shift_times(times: str, frequency: str, user_tz: pytz.timezone) -> str:
-    """
-    Shift times based on frequency (minutes and hours only).
-
-    Args:
-        times: Comma-separated times
-        frequency: Frequency string
-        user_tz: User timezone
-
-    Returns:
-        Shifted times as comma-separated string
-    """
-    intervals = parse_frequency(frequency)
-    if intervals['min'] == 0 and intervals['h'] == 0:
-        return times
-
-    time_list = times.split(",")
-    shifted_times = []
-    for time in time_list:
-        time_dt = datetime.datetime.strptime(time, TIME_FORMAT)
-        time_dt = user_tz.localize(time_dt)
-        shifted_dt = time_dt + datetime.timedelta(
-            hours=intervals['h'],
-            minutes=intervals['min']
-        )
-        shifted_time = shifted_dt.strftime(TIME_FORMAT)
-        shifted_times.append(shifted_time)
-    return ",".join(shifted_times)
-
-
-def shift_dates(dates: str, frequency: str, user_tz: pytz.timezone) -> str:
-    """
-    Shift dates based on frequency (days, months, years).
-
-    Args:
-        dates: Comma-separated dates
-        frequency: Frequency string
-        user_tz: User timezone
-
-    Returns:
-        Shifted dates as comma-separated string
-    """
-    intervals = parse_frequency(frequency)
-    if intervals['d'] == 0 and intervals['m'] == 0 and intervals['y'] == 0:
-        return dates
-
-    date_list = dates.split(",")
-    shifted_dates = []
-    for date in date_list:
-        date_dt = datetime.datetime.strptime(date, FULL_DATE_FORMAT)
-        date_dt = user_tz.localize(date_dt)
-        shifted_dt = date_dt + relativedelta(
-            days=intervals['d'],
-            months=intervals['m'],
-            years=intervals['y']
-        )
-        shifted_date = shifted_dt.strftime(FULL_DATE_FORMAT)
-        shifted_dates.append(shifted_date)
-    return ",".join(shifted_dates)
-
-
 def resolve_date(date_str: str) -> tuple[str, bool]:
     """
     Parse and resolve date string.
@@ -182,3 +91,83 @@ def finalize_date(
     if parsed_day_month < current_day_month:
         return parsed_dt.replace(year=current_dt_user.year + 1).strftime(FULL_DATE_FORMAT)
     return parsed_dt.replace(year=current_dt_user.year).strftime(FULL_DATE_FORMAT)
+
+
+def current_minute_timestamp() -> int:
+    """
+    Get the start of the current minute as a UTC epoch timestamp.
+
+    Returns:
+        UTC epoch seconds truncated to the minute
+    """
+    now_ts = int(datetime.datetime.now(pytz.UTC).timestamp())
+    return now_ts - now_ts % 60
+
+
+def compute_next_fire_at(
+    dates: str,
+    times: str,
+    timezone: str,
+    after: int
+) -> int | None:
+    """
+    Find the earliest date/time slot of a reminder not before a given instant.
+
+    Args:
+        dates: Comma-separated dates (DD.MM.YYYY)
+        times: Comma-separated times (HH:MM)
+        timezone: User's timezone string
+        after: Lower bound as UTC epoch seconds (inclusive)
+
+    Returns:
+        UTC epoch seconds of the next slot or None if all slots are in the past
+    """
+    upcoming = [ts for ts in occurrence_timestamps(dates, times, timezone) if ts >= after]
+    return upcoming[0] if upcoming else None
+
+
+def earliest_timestamp(*timestamps: int | None) -> int | None:
+    """
+    Pick the earliest of several optional timestamps.
+
+    Args:
+        timestamps: UTC epoch seconds or None
+
+    Returns:
+        The smallest timestamp or None if none is set
+    """
+    return min((ts for ts in timestamps if ts is not None), default=None)
+
+
+def occurrence_timestamps(dates: str, times: str, timezone: str) -> list[int]:
+    """
+    Expand the date/time slots of a reminder into UTC timestamps.
+
+    Args:
+        dates: Comma-separated dates (DD.MM.YYYY)
+        times: Comma-separated times (HH:MM)
+        timezone: User's timezone string
+
+    Returns:
+        Sorted list of distinct UTC epoch seconds
+    """
+    return sorted({
+        _slot_timestamp(date, time, timezone)
+        for date in dates.split(",")
+        for time in times.split(",")
+    })
+
+
+@functools.lru_cache(maxsize=4096)
+def _slot_timestamp(date: str, time: str, timezone: str) -> int:
+    """
+    Convert a local date/time slot to UTC epoch seconds.
+
+    Most reminders share a handful of dates, times and timezones, so the
+    parsing and localization is cached per distinct slot.
+    """
+    slot_dt = datetime.datetime.strptime(
+        f"{date} {time}",
+        f'{FULL_DATE_FORMAT} {TIME_FORMAT}'
+    )
+    return int(pytz.timezone(timezone).localize(slot_dt).timestamp())
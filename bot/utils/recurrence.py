@@ -0,0 +1,199 @@
+"""Lazily evaluated reminder schedules."""
+
+import datetime
+import functools
+import heapq
+import re
+from typing import Iterator, NamedTuple
+
+import pytz
+from dateutil.relativedelta import relativedelta
+
+from bot.config import FULL_DATE_FORMAT, TIME_FORMAT
+from bot.utils.datetime_utils import parse_frequency
+
+_TIME_WINDOW_PATTERN = re.compile(r'^(\d{2}:\d{2})-(\d{2}:\d{2})/(\d+)$')
+
+
+class TimeWindow(NamedTuple):
+    """
+    Repeats within a day, stored in reminders.times as "HH:MM-HH:MM/step".
+
+    The window fires at start, start + step, ... up to and including end.
+    """
+    start: str
+    end: str
+    step_minutes: int
+
+    def __str__(self) -> str:
+        return f"{self.start}-{self.end}/{self.step_minutes}"
+
+    @property
+    def span(self) -> datetime.timedelta:
+        """Time from the first to the last possible occurrence."""
+        return (
+            datetime.datetime.strptime(self.end, TIME_FORMAT)
+            - datetime.datetime.strptime(self.start, TIME_FORMAT)
+        )
+
+
+def parse_time_window(time_str: str) -> TimeWindow | None:
+    """
+    Parse a time window entry of reminders.times.
+
+    Args:
+        time_str: Entry of the comma-separated times
+
+    Returns:
+        TimeWindow, or None if the entry is a plain time (HH:MM)
+
+    Raises:
+        ValueError: If the window is malformed or empty
+    """
+    match = _TIME_WINDOW_PATTERN.match(time_str.strip())
+    if not match:
+        return None
+
+    window = TimeWindow(match.group(1), match.group(2), int(match.group(3)))
+    if window.step_minutes <= 0 or window.span <= datetime.timedelta(0):
+        raise ValueError(f"Invalid time window: {time_str}")
+    return window
+
+
+class Recurrence:
+    """
+    Schedule of a reminder compiled from its frequency, dates and times.
+
+    Every date/time slot starts a series that repeats with the frequency
+    (a one-off reminder has a single element per series). A time window
+    slot additionally repeats with its step inside every period; the
+    frequency must be longer than the window. Occurrences are generated
+    on demand, starting close to the requested instant instead of at the
+    first slot, so asking for the next N costs O(N).
+    """
+
+    def __init__(self, frequency: str, dates: str, times: str, timezone: str):
+        self._tz = pytz.timezone(timezone)
+
+        # (start, number of steps, step) per slot; a plain time is a window without steps
+        slots = set()
+        for time in times.split(","):
+            window = parse_time_window(time)
+            start_time = window.start if window else time.strip()
+            steps, step = 0, datetime.timedelta(minutes=1)
+            if window:
+                step = datetime.timedelta(minutes=window.step_minutes)
+                steps = window.span // step
+            for date in dates.split(","):
+                start = datetime.datetime.strptime(
+                    f"{date} {start_time}", f"{FULL_DATE_FORMAT} {TIME_FORMAT}"
+                )
+                slots.add((start, steps, step))
+        self._starts = sorted(slots)
+
+        intervals = parse_frequency(frequency)
+        self._step = None
+        if any(intervals.values()):
+            self._step = relativedelta(
+                years=intervals['y'],
+                months=intervals['m'],
+                days=intervals['d'],
+                hours=intervals['h'],
+                minutes=intervals['min']
+            )
+            # Longest possible step, so index estimates never skip an occurrence
+            self._max_step = datetime.timedelta(
+                days=31 * (intervals['y'] * 12 + intervals['m']) + intervals['d'],
+                hours=intervals['h'],
+                minutes=intervals['min']
+            )
+
+    @property
+    def slot_count(self) -> int:
+        """
+        Number of distinct date/time slots.
+
+        This is how many occurrences are stored ahead. A time window counts
+        as one slot, so it is stored as its next occurrence only.
+        """
+        return len(self._starts)
+
+    @property
+    def repeats(self) -> bool:
+        """Whether any slot has more than one occurrence."""
+        return self._step is not None or any(steps for _, steps, _ in self._starts)
+
+    def after(self, after: int, count: int = 1) -> list[int]:
+        """
+        Get the next occurrences not before a given instant.
+
+        Args:
+            after: Lower bound as UTC epoch seconds (inclusive)
+            count: Maximum number of occurrences to return
+
+        Returns:
+            Sorted list of distinct UTC epoch seconds
+        """
+        threshold = datetime.datetime.fromtimestamp(after, self._tz).replace(tzinfo=None)
+        series = (self._series(*slot, threshold) for slot in self._starts)
+
+        occurrences = []
+        for local_dt in heapq.merge(*series):
+            fire_at = int(self._tz.localize(local_dt).timestamp())
+            if fire_at < after or (occurrences and occurrences[-1] == fire_at):
+                continue
+            occurrences.append(fire_at)
+            if len(occurrences) == count:
+                break
+        return occurrences
+
+    def _series(
+        self,
+        start: datetime.datetime,
+        steps: int,
+        step: datetime.timedelta,
+        threshold: datetime.datetime
+    ) -> Iterator[datetime.datetime]:
+        """Yield local occurrences of one slot, beginning shortly before threshold."""
+        for period_start in self._periods(start, threshold):
+            # Position inside a window is computed, not searched;
+            # one step of slack covers DST shifts like in _periods
+            first = 0
+            if threshold > period_start:
+                first = max(0, -((period_start - threshold) // step) - 1)
+            for index in range(first, steps + 1):
+                yield period_start + step * index
+
+    def _periods(self, start: datetime.datetime, threshold: datetime.datetime) -> Iterator[datetime.datetime]:
+        """Yield local period starts of one slot, beginning shortly before threshold."""
+        if self._step is None:
+            yield start
+            return
+
+        index = 0
+        if threshold > start:
+            # One period of slack covers DST shifts between local and absolute time
+            index = max(0, (threshold - start) // self._max_step - 1)
+        while True:
+            yield start + self._step * index
+            index += 1
+
+
+@functools.lru_cache(maxsize=1024)
+def get_recurrence(frequency: str, dates: str, times: str, timezone: str) -> Recurrence:
+    """
+    Get the compiled schedule of a reminder.
+
+    The cache is keyed by the schedule itself, so an edited reminder
+    simply gets a new object.
+
+    Args:
+        frequency: Frequency string
+        dates: Comma-separated dates (DD.MM.YYYY)
+        times: Comma-separated times (HH:MM) or time windows (HH:MM-HH:MM/step)
+        timezone: User's timezone string
+
+    Returns:
+        Recurrence of the reminder
+    """
+    return Recurrence(frequency, dates, times, timezone)
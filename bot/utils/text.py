@@ -0,0 +1,17 @@
+"""Text helpers for bot messages."""
+
+
+def shorten(text: str, max_length: int | None) -> str:
+    """
+    Cut text to max_length characters, marking the cut with an ellipsis.
+
+    Args:
+        text: Text to cut
+        max_length: Maximum length, or None to keep the text as is
+
+    Returns:
+        Text of at most max_length characters
+    """
+    if max_length is None or len(text) <= max_length:
+        return text
+    return text[:max_length - 1] + "…"
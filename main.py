@@ -2,14 +2,19 @@
 
 import asyncio
 import logging
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
 
-from bot.config import API_TOKEN, CHECK_INTERVAL_SECONDS
-from bot.database import create_db
-from bot.handlers import start_router, reminders_router, timezone_router
-from bot.services import send_reminders
+from bot.config import API_TOKEN
+from bot.database import (
+    SQLiteStorage,
+    create_db,
+    open_connections,
+    close_connections,
+    start_writer,
+    stop_writer
+)
+from bot.handlers import start_router, reminders_router, timezone_router, settings_router
+from bot.services import reminder_engine, outbox_sender
 
 # Configure logging
 logging.basicConfig(
@@ -22,19 +27,25 @@ logger = logging.getLogger(__name__)
 async def on_startup(bot: Bot):
     """Execute on bot startup."""
     logger.info("Starting reminder bot...")
+    await open_connections()
     await create_db()
+    await start_writer()
     logger.info("Database initialized")
 
-    # Start scheduler for sending reminders
-    scheduler = AsyncIOScheduler()
-    scheduler.add_job(
-        send_reminders,
-        "interval",
-        seconds=CHECK_INTERVAL_SECONDS,
-        args=[bot]
-    )
-    scheduler.start()
-    logger.info(f"Scheduler started (check interval: {CHECK_INTERVAL_SECONDS}s)")
+    # Start timer engine for due reminders and the sender of their messages
+    await outbox_sender.start(bot)
+    await reminder_engine.start()
+
+
+async def on_shutdown():
+    """Execute on bot shutdown."""
+    await reminder_engine.stop()
+    logger.info("Reminder engine stopped")
+    await outbox_sender.stop()
+    logger.info("Outbox sender stopped")
+    await stop_writer()
+    await close_connections()
+    logger.info("Database connections closed")
 
 
 async def main():
@@ -46,12 +57,13 @@ async def main():
 
     # Initialize bot and dispatcher
     bot = Bot(token=API_TOKEN)
-    storage = MemoryStorage()
+    storage = SQLiteStorage()
     dp = Dispatcher(storage=storage)
 
     # Register routers
     dp.include_router(start_router)
     dp.include_router(timezone_router)
+    dp.include_router(settings_router)
     dp.include_router(reminders_router)
 
     # Register startup handler
@@ -59,6 +71,7 @@ async def main():
         await on_startup(bot)
 
     dp.startup.register(startup_wrapper)
+    dp.shutdown.register(on_shutdown)
 
     try:
         logger.info("Bot is running...")